@@ -1,9 +1,11 @@
 import sqlite3
 import logging
-from datetime import datetime
-from typing import List, Dict, Optional
-from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import List, Dict, Optional, Tuple
 import os
+import threading
+import time
+from functools import lru_cache
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -15,76 +17,376 @@ DB_PATH = str(DB_DIR / "devices.db")
 
 logger.info(f"Database location: {DB_PATH}")
 
-
-@contextmanager
-def get_db():
-    """Context manager for database connections"""
-    conn = sqlite3.connect(DB_PATH)
+# Columns added to the devices table after the first release, in the order
+# they were introduced, as (name, definition) pairs
+DEVICE_COLUMN_MIGRATIONS = (
+    ('notes', "TEXT DEFAULT ''"),
+    ('consecutive_online', "INTEGER DEFAULT 0"),  # Streak tracking
+    ('pihole_detected', "INTEGER DEFAULT 0"),
+    ('pihole_admin_url', "TEXT"),
+    ('first_scan_id', "INTEGER"),  # total_scans is derived from it
+)
+
+# Categorization log entries are written for every device on every scan;
+# older entries are pruned at startup and then at most once per
+# CATEGORIZATION_LOG_PRUNE_INTERVAL seconds from persist_scan()
+CATEGORIZATION_LOG_RETENTION_DAYS = 30
+CATEGORIZATION_LOG_PRUNE_INTERVAL = 3600
+
+# Per-connection tuning. journal_mode=WAL is persistent in the database file
+# and is set once in init_database(); everything below resets on every connect.
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",        # WAL makes NORMAL crash-safe; one fsync less per commit
+    "PRAGMA busy_timeout=5000",         # Wait for a concurrent writer instead of failing fast
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-20000",         # 20 MB page cache
+    "PRAGMA journal_size_limit=67108864",  # Truncate the WAL back to 64 MB after checkpoints
+    "PRAGMA mmap_size=268435456",       # Read pages through a 256 MB memory map instead of read() calls
+)
+
+# SQL used on the per-scan write path. Keeping the text in module constants
+# means every call hands sqlite3 the same string object, so its statement
+# cache hits instead of re-preparing.
+SQL_UPSERT_DEVICE_ONLINE = """
+    INSERT INTO devices (
+        ip, mac, hostname, first_seen, last_seen, last_seen_online,
+        first_scan_id, scans_seen_online, scans_seen_offline,
+        consecutive_offline, created_at, updated_at
+    ) VALUES (?, ?, ?, ?, ?, ?, (SELECT COALESCE(MAX(id), 0) FROM scans), 1, 1, 0, ?, ?)
+    ON CONFLICT(ip) DO UPDATE SET
+        mac = excluded.mac,
+        -- A lookup that missed the scan's DNS deadline comes back 'Unknown';
+        -- don't let it overwrite a name resolved on an earlier scan
+        hostname = COALESCE(NULLIF(excluded.hostname, 'Unknown'), hostname),
+        last_seen = excluded.last_seen,
+        last_seen_online = excluded.last_seen_online,
+        scans_seen_online = scans_seen_online + 1,
+        consecutive_offline = 0,
+        consecutive_online = consecutive_online + 1,
+        updated_at = excluded.updated_at
+"""
+
+SQL_UPSERT_DEVICE_OFFLINE = """
+    INSERT INTO devices (
+        ip, mac, hostname, first_seen, last_seen, last_seen_online,
+        first_scan_id, scans_seen_online, scans_seen_offline,
+        consecutive_offline, created_at, updated_at
+    ) VALUES (?, ?, ?, ?, ?, NULL, (SELECT COALESCE(MAX(id), 0) FROM scans), 0, 0, 0, ?, ?)
+    ON CONFLICT(ip) DO UPDATE SET
+        last_seen = excluded.last_seen,
+        scans_seen_offline = scans_seen_offline + 1,
+        consecutive_offline = consecutive_offline + 1,
+        consecutive_online = 0,
+        updated_at = excluded.updated_at
+"""
+
+# A device's total_scans is the number of scans recorded since (and
+# including) the one it first appeared in. Deriving it from the scans table
+# replaces rewriting every device row on every scan. The devices table had
+# a stored total_scans counter before this; init_database() drops it.
+SQL_TOTAL_SCANS = "(SELECT COALESCE(MAX(id), 0) FROM scans) - first_scan_id + 1"
+
+# Base devices schema; later columns are added by DEVICE_COLUMN_MIGRATIONS.
+# {table} lets init_database() rebuild the table under another name.
+SQL_CREATE_DEVICES_TABLE = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        ip TEXT UNIQUE NOT NULL,
+        mac TEXT NOT NULL,
+        hostname TEXT,
+        notes TEXT DEFAULT '',
+        first_seen TEXT NOT NULL,
+        last_seen TEXT NOT NULL,
+        last_seen_online TEXT,
+        scans_seen_online INTEGER DEFAULT 0,
+        scans_seen_offline INTEGER DEFAULT 0,
+        consecutive_offline INTEGER DEFAULT 0,
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    )
+"""
+
+# Only the columns compare_devices() and calculate_device_category() read
+SQL_SELECT_DEVICE_HISTORY_COLUMNS = f"""
+    SELECT ip, first_seen, {SQL_TOTAL_SCANS} AS total_scans, scans_seen_online,
+           consecutive_offline, consecutive_online, notes
+    FROM devices
+"""
+
+SQL_SELECT_DEVICE_HISTORY = SQL_SELECT_DEVICE_HISTORY_COLUMNS + "WHERE ip = ?"
+
+SQL_SELECT_ALL_DEVICES = f"""
+    SELECT id, ip, mac, hostname, notes, first_seen, last_seen, last_seen_online,
+           {SQL_TOTAL_SCANS} AS total_scans, scans_seen_online, scans_seen_offline,
+           consecutive_offline, consecutive_online, created_at, updated_at
+    FROM devices
+    ORDER BY last_seen DESC
+"""
+
+# Just the counters category_of() needs, for whole-table categorization
+SQL_SELECT_CATEGORY_COUNTERS = f"""
+    SELECT ip, {SQL_TOTAL_SCANS} AS total_scans, scans_seen_online
+    FROM devices
+"""
+
+SQL_INSERT_SCAN = """
+    INSERT INTO scans (scan_time, devices_found, scan_method)
+    VALUES (?, ?, ?)
+"""
+
+SQL_INSERT_CAT_LOG = """
+    INSERT INTO categorization_log (
+        scan_id, ip, hostname, total_scans, scans_seen_online,
+        appearance_rate, category, device_status, reason, timestamp
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+SQL_UPSERT_PORT_SCAN = """
+    INSERT OR REPLACE INTO port_scans (ip, port, status, service, scan_time)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+
+def configure_connection(conn: sqlite3.Connection):
+    """Apply per-connection PRAGMAs"""
+    for pragma in CONNECTION_PRAGMAS:
+        # Drain the result row so the PRAGMA is fully stepped
+        conn.execute(pragma).fetchall()
+
+
+# Connections are opened once per thread and reused. Each thread gets a
+# read-write connection and, on demand, a separate read-only one.
+_local = threading.local()
+
+# SQLite allows a single writer at a time; serialize write transactions in
+# process so they queue here instead of spinning on SQLITE_BUSY.
+_write_lock = threading.Lock()
+
+# Every pooled connection as (connection, read_only), so close_db() can
+# reach the ones owned by other threads at shutdown
+_connections: List[Tuple[sqlite3.Connection, bool]] = []
+_connections_lock = threading.Lock()
+
+
+def _connect(read_only: bool = False) -> sqlite3.Connection:
+    """Open and configure a new database connection"""
+    if read_only:
+        conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True, check_same_thread=False)
+    else:
+        conn = sqlite3.connect(DB_PATH, check_same_thread=False, isolation_level="DEFERRED")
     conn.row_factory = sqlite3.Row
-    try:
-        yield conn
-        conn.commit()
-    except Exception as e:
-        conn.rollback()
-        raise e
-    finally:
-        conn.close()
+    configure_connection(conn)
+    with _connections_lock:
+        _connections.append((conn, read_only))
+    return conn
+
+
+def _get_connection() -> sqlite3.Connection:
+    """Get this thread's read-write connection"""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = _local.conn = _connect()
+    return conn
+
+
+def _get_ro_connection() -> sqlite3.Connection:
+    """Get this thread's read-only connection"""
+    conn = getattr(_local, "ro_conn", None)
+    if conn is None:
+        conn = _local.ro_conn = _connect(read_only=True)
+    return conn
+
+
+class _WriteTransaction:
+    """
+    Context manager for a write transaction on a pooled connection.
+
+    A plain class rather than a @contextmanager generator: with a `with
+    get_db()` block on every write, skipping the generator frame and the
+    exception re-throw adds up.
+    """
+    __slots__ = ('conn',)
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        _write_lock.acquire()
+        try:
+            # Take the write lock up front so the transaction can't deadlock
+            # trying to upgrade from a read lock later on
+            self.conn.execute("BEGIN IMMEDIATE")
+        except BaseException:
+            _write_lock.release()
+            raise
+        return self.conn
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                try:
+                    self.conn.commit()
+                except Exception:
+                    self.conn.rollback()
+                    raise
+            else:
+                self.conn.rollback()
+        finally:
+            _write_lock.release()
+        return False
+
+
+def get_db() -> _WriteTransaction:
+    """Context manager for a write transaction on the pooled connection"""
+    return _WriteTransaction(_get_connection())
+
+
+def get_db_ro() -> sqlite3.Connection:
+    """
+    Get the pooled read-only connection.
+
+    Use it directly in a `with` block; sqlite3.Connection is its own
+    context manager.
+    """
+    return _get_ro_connection()
+
+
+# In-memory copy of the devices table for the read-heavy API endpoints, so
+# UI refreshes never touch the on-disk database. Rebuilt after every device
+# write; guarded by its own lock since it's shared across threads.
+_mirror_lock = threading.Lock()
+_mirror: Optional[sqlite3.Connection] = None
+
+
+def _refresh_devices_mirror():
+    """Copy the current devices table into the in-memory mirror"""
+    global _mirror
+    # The read is under the lock too: refreshes from different threads
+    # (a scan's persist_scan, a notes edit) would otherwise be able to
+    # write their rows in the opposite order they read them, leaving the
+    # older snapshot in the mirror
+    with _mirror_lock:
+        with get_db_ro() as conn:
+            cursor = conn.execute(SQL_SELECT_ALL_DEVICES)
+            columns = [col[0] for col in cursor.description]
+            rows = cursor.fetchall()
+
+        if _mirror is None:
+            _mirror = sqlite3.connect(":memory:", check_same_thread=False)
+            _mirror.row_factory = sqlite3.Row
+            _mirror.execute(f"CREATE TABLE devices ({', '.join(columns)})")
+
+        with _mirror:
+            _mirror.execute("DELETE FROM devices")
+            _mirror.executemany(
+                f"INSERT INTO devices VALUES ({', '.join('?' * len(columns))})",
+                rows
+            )
+
+
+# Bumped after every committed write to the matching table. The cached
+# stats readers take these as their lru_cache key, so a write invalidates
+# them without any explicit cache clearing.
+_cache_version = {"scans": 0, "devices": 0}
+
+# time.monotonic() of the last categorization log prune
+_last_prune = 0.0
+
+
+def close_db():
+    """
+    Close every pooled connection, e.g. on application shutdown.
+
+    Read-write connections run PRAGMA optimize first. SQLite recommends
+    running it just before a connection closes; it only re-analyzes tables
+    whose statistics have drifted, so it's usually a no-op.
+    """
+    with _connections_lock:
+        connections = list(_connections)
+        _connections.clear()
+
+    for conn, read_only in connections:
+        try:
+            if not read_only:
+                conn.execute("PRAGMA optimize")
+            conn.close()
+        except sqlite3.Error as e:
+            logger.warning(f"Error closing database connection: {e}")
+
+    _local.__dict__.clear()
 
 
 def init_database():
     """Initialize the database schema"""
+    conn = _get_connection()
+
+    # Let pruned pages be handed back to the filesystem incrementally. This
+    # only takes effect on a brand-new database (before any table exists);
+    # existing files keep their mode until a full VACUUM.
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+
+    # Write-ahead logging lets readers run alongside the scan-time writer.
+    # The mode is stored in the database file, so this only needs to run once,
+    # and it can't be changed inside a transaction.
+    journal_mode = conn.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+    if journal_mode.lower() != "wal":
+        logger.warning(f"Could not enable WAL mode (journal_mode={journal_mode})")
+
     with get_db() as conn:
         cursor = conn.cursor()
 
         # Create devices table
+        cursor.execute(SQL_CREATE_DEVICES_TABLE.format(table="devices"))
+
+        # Create scans table to track scan history
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS devices (
+            CREATE TABLE IF NOT EXISTS scans (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                ip TEXT UNIQUE NOT NULL,
-                mac TEXT NOT NULL,
-                hostname TEXT,
-                notes TEXT DEFAULT '',
-                first_seen TEXT NOT NULL,
-                last_seen TEXT NOT NULL,
-                last_seen_online TEXT,
-                total_scans INTEGER DEFAULT 0,
-                scans_seen_online INTEGER DEFAULT 0,
-                scans_seen_offline INTEGER DEFAULT 0,
-                consecutive_offline INTEGER DEFAULT 0,
-                created_at TEXT NOT NULL,
-                updated_at TEXT NOT NULL
+                scan_time TEXT NOT NULL,
+                devices_found INTEGER DEFAULT 0,
+                scan_method TEXT
             )
         """)
 
-        # Add notes column to existing databases (migration)
-        try:
-            cursor.execute("ALTER TABLE devices ADD COLUMN notes TEXT DEFAULT ''")
-            conn.commit()
-        except sqlite3.OperationalError:
-            # Column already exists
-            pass
-
-        # Add consecutive_online column for streak tracking (migration)
-        try:
-            cursor.execute("ALTER TABLE devices ADD COLUMN consecutive_online INTEGER DEFAULT 0")
-            conn.commit()
-        except sqlite3.OperationalError:
-            # Column already exists
-            pass
+        # Add columns introduced after the first release (migrations).
+        # Check what exists up front instead of probing with ALTER TABLE,
+        # which takes the write lock and reloads the schema every startup.
+        existing_columns = {row['name'] for row in cursor.execute("PRAGMA table_info(devices)")}
+        for column, definition in DEVICE_COLUMN_MIGRATIONS:
+            if column not in existing_columns:
+                cursor.execute(f"ALTER TABLE devices ADD COLUMN {column} {definition}")
+                logger.info(f"Added devices.{column} column")
+
+        if 'first_scan_id' not in existing_columns and 'total_scans' in existing_columns:
+            # Carry over the total_scans counters maintained before the column existed
+            cursor.execute("""
+                UPDATE devices
+                SET first_scan_id = (SELECT COALESCE(MAX(id), 0) FROM scans) - total_scans + 1
+            """)
+
+        if 'total_scans' in existing_columns:
+            # The stored counter is replaced by SQL_TOTAL_SCANS and would only
+            # go stale. ALTER TABLE DROP COLUMN needs SQLite 3.35, so the table
+            # is rebuilt without it instead
+            cursor.execute(SQL_CREATE_DEVICES_TABLE.format(table="devices_rebuild"))
+            rebuilt_columns = {row['name'] for row in cursor.execute("PRAGMA table_info(devices_rebuild)")}
+            for column, definition in DEVICE_COLUMN_MIGRATIONS:
+                if column not in rebuilt_columns:
+                    cursor.execute(f"ALTER TABLE devices_rebuild ADD COLUMN {column} {definition}")
+            columns = ", ".join(row['name'] for row in cursor.execute("PRAGMA table_info(devices_rebuild)"))
+            cursor.execute(f"INSERT INTO devices_rebuild ({columns}) SELECT {columns} FROM devices")
+            cursor.execute("DROP TABLE devices")
+            cursor.execute("ALTER TABLE devices_rebuild RENAME TO devices")
+            logger.info("Dropped devices.total_scans column")
 
         # Create index on IP for faster lookups
         cursor.execute("""
             CREATE INDEX IF NOT EXISTS idx_devices_ip ON devices(ip)
         """)
 
-        # Create scans table to track scan history
+        # Create index for the "active in the last 24h" stat
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS scans (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                scan_time TEXT NOT NULL,
-                devices_found INTEGER DEFAULT 0,
-                scan_method TEXT
-            )
+            CREATE INDEX IF NOT EXISTS idx_devices_last_online ON devices(last_seen_online)
         """)
 
         # Create categorization log table
@@ -112,6 +414,9 @@ def init_database():
         cursor.execute("""
             CREATE INDEX IF NOT EXISTS idx_cat_log_scan ON categorization_log(scan_id)
         """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_cat_log_timestamp ON categorization_log(timestamp)
+        """)
 
         # Create port scans table
         cursor.execute("""
@@ -126,36 +431,53 @@ def init_database():
             )
         """)
 
-        # Create index on port scans
+        # Create index on port scans. (ip, scan_time) also covers plain ip
+        # lookups, so the older single-column index is redundant.
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_port_scans_ip ON port_scans(ip)
+            CREATE INDEX IF NOT EXISTS idx_port_scans_ip_time ON port_scans(ip, scan_time DESC)
         """)
+        cursor.execute("DROP INDEX IF EXISTS idx_port_scans_ip")
+
+        # Give the query planner real row counts the first time round;
+        # from then on the PRAGMA optimize in close_db() keeps them current
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+        if cursor.fetchone() is None:
+            cursor.execute("ANALYZE")
 
         conn.commit()
         logger.info(f"Database initialized at {DB_PATH}")
 
+    prune_categorization_log()
 
-def record_scan(devices_found: int, scan_method: str = "scapy") -> int:
+
+def record_scan(devices_found: int, scan_method: str = "scapy", now: Optional[str] = None) -> int:
     """Record a scan event and return scan_id"""
+    if now is None:
+        now = datetime.now().isoformat()
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO scans (scan_time, devices_found, scan_method)
-            VALUES (?, ?, ?)
-        """, (datetime.now().isoformat(), devices_found, scan_method))
-        return cursor.lastrowid
+        cursor.execute(SQL_INSERT_SCAN, (now, devices_found, scan_method))
+        scan_id = cursor.lastrowid
 
+    _cache_version["scans"] += 1
+    return scan_id
 
-def get_total_scans() -> int:
-    """Get total number of scans performed"""
-    with get_db() as conn:
+
+@lru_cache(maxsize=1)
+def _total_scans_at(scans_version: int) -> int:
+    with get_db_ro() as conn:
         cursor = conn.cursor()
         cursor.execute("SELECT COUNT(*) as count FROM scans")
         result = cursor.fetchone()
         return result['count'] if result else 0
 
 
-def update_device(ip: str, mac: str, hostname: str, is_online: bool = True):
+def get_total_scans() -> int:
+    """Get total number of scans performed"""
+    return _total_scans_at(_cache_version["scans"])
+
+
+def update_device(ip: str, mac: str, hostname: str, is_online: bool = True, now: Optional[str] = None):
     """
     Update or insert device record.
 
@@ -164,69 +486,105 @@ def update_device(ip: str, mac: str, hostname: str, is_online: bool = True):
         mac: Device MAC address
         hostname: Device hostname
         is_online: Whether device is currently online
+        now: ISO timestamp to record (defaults to the current time)
+    """
+    bulk_update_devices([(ip, mac, hostname, is_online)], now=now)
+
+
+def bulk_update_devices(rows: List[Tuple[str, str, str, bool]], now: Optional[str] = None):
+    """
+    Update or insert many device records in a single transaction.
+
+    Args:
+        rows: (ip, mac, hostname, is_online) tuples, one per device
+        now: ISO timestamp to record for every row (defaults to the current time)
     """
-    now = datetime.now().isoformat()
+    if not rows:
+        return
+
+    if now is None:
+        now = datetime.now().isoformat()
 
     with get_db() as conn:
-        cursor = conn.cursor()
+        _write_device_rows(conn, rows, now)
 
-        # Check if device exists
-        cursor.execute("SELECT * FROM devices WHERE ip = ?", (ip,))
-        existing = cursor.fetchone()
-
-        if existing:
-            # Update existing device
-            if is_online:
-                cursor.execute("""
-                    UPDATE devices SET
-                        mac = ?,
-                        hostname = ?,
-                        last_seen = ?,
-                        last_seen_online = ?,
-                        scans_seen_online = scans_seen_online + 1,
-                        consecutive_offline = 0,
-                        consecutive_online = consecutive_online + 1,
-                        updated_at = ?
-                    WHERE ip = ?
-                """, (mac, hostname, now, now, now, ip))
-            else:
-                cursor.execute("""
-                    UPDATE devices SET
-                        last_seen = ?,
-                        scans_seen_offline = scans_seen_offline + 1,
-                        consecutive_offline = consecutive_offline + 1,
-                        consecutive_online = 0,
-                        updated_at = ?
-                    WHERE ip = ?
-                """, (now, now, ip))
+    _cache_version["devices"] += 1
+    _refresh_devices_mirror()
+
+
+def _write_device_rows(conn: sqlite3.Connection, rows: List[Tuple[str, str, str, bool]], now: str):
+    """Upsert (ip, mac, hostname, is_online) rows inside the caller's transaction"""
+    online_rows = []
+    offline_rows = []
+    for ip, mac, hostname, is_online in rows:
+        if is_online:
+            online_rows.append((ip, mac, hostname, now, now, now, now, now))
         else:
-            # Insert new device
-            cursor.execute("""
-                INSERT INTO devices (
-                    ip, mac, hostname, first_seen, last_seen, last_seen_online,
-                    total_scans, scans_seen_online, scans_seen_offline,
-                    consecutive_offline, created_at, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?, 0, ?, ?)
-            """, (
-                ip, mac, hostname, now, now, now if is_online else None,
-                1 if is_online else 0,
-                1 if is_online else 0,
-                now, now
-            ))
-
-
-def increment_total_scans():
-    """Increment total_scans counter for all devices"""
+            offline_rows.append((ip, mac, hostname, now, now, now, now))
+
+    cursor = conn.cursor()
+
+    # Insert new devices, or bump the counters of known ones, in one statement
+    cursor.executemany(SQL_UPSERT_DEVICE_ONLINE, online_rows)
+    cursor.executemany(SQL_UPSERT_DEVICE_OFFLINE, offline_rows)
+
+
+def project_device_history(history: Optional[Dict], is_online: bool, now: str) -> Dict:
+    """
+    Return the history a device will have once this scan's row for it has
+    been written, without touching the database.
+
+    Mirrors what SQL_UPSERT_DEVICE_ONLINE/OFFLINE do to the counters.
+    history is the device's get_device_history() row from before the write
+    (None if it has never been seen), read after record_scan() so that
+    total_scans already counts this scan.
+    """
+    if history is None:
+        return {
+            'first_seen': now,
+            'total_scans': 1,
+            'scans_seen_online': 1 if is_online else 0,
+            'consecutive_offline': 0,
+            'consecutive_online': 0,
+            'notes': ''
+        }
+
+    projected = dict(history)
+    if is_online:
+        projected['scans_seen_online'] += 1
+        projected['consecutive_offline'] = 0
+        projected['consecutive_online'] += 1
+    else:
+        projected['consecutive_offline'] += 1
+        projected['consecutive_online'] = 0
+    return projected
+
+
+def persist_scan(device_rows: List[Tuple[str, str, str, bool]], cat_rows: List[Tuple], now: str):
+    """
+    Write a scan's device updates and categorization log in one transaction.
+
+    Args:
+        device_rows: (ip, mac, hostname, is_online) tuples, as for bulk_update_devices()
+        cat_rows: categorization log tuples, as for bulk_log_categorization()
+        now: ISO timestamp of the scan
+    """
     with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute("UPDATE devices SET total_scans = total_scans + 1")
+        _write_device_rows(conn, device_rows, now)
+        conn.executemany(SQL_INSERT_CAT_LOG, cat_rows)
+
+    _cache_version["devices"] += 1
+    _refresh_devices_mirror()
+
+    if time.monotonic() - _last_prune >= CATEGORIZATION_LOG_PRUNE_INTERVAL:
+        prune_categorization_log()
 
 
 def get_device_history(ip: str) -> Optional[Dict]:
-    """Get device history from database"""
-    with get_db() as conn:
+    """Get the scan counters and first-seen/notes fields for a device"""
+    with get_db_ro() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM devices WHERE ip = ?", (ip,))
+        cursor.execute(SQL_SELECT_DEVICE_HISTORY, (ip,))
         row = cursor.fetchone()
 
         if row:
@@ -234,15 +592,86 @@ def get_device_history(ip: str) -> Optional[Dict]:
         return None
 
 
+@lru_cache(maxsize=64)
+def _sql_select_device_histories(count: int) -> str:
+    """
+    SELECT for `count` IPs. The device count barely changes between scans,
+    so this is built once per size rather than formatted on every call.
+    """
+    placeholders = ",".join("?" * count)
+    return f"{SQL_SELECT_DEVICE_HISTORY_COLUMNS}WHERE ip IN ({placeholders})"
+
+
+def get_device_histories(ips: List[str]) -> Dict[str, Dict]:
+    """
+    Batch version of get_device_history(): one query for many devices, keyed by IP.
+
+    IPs with no history are left out of the result.
+    """
+    if not ips:
+        return {}
+
+    with get_db_ro() as conn:
+        cursor = conn.cursor()
+        cursor.execute(_sql_select_device_histories(len(ips)), ips)
+        return {row['ip']: dict(row) for row in cursor.fetchall()}
+
+
 def get_all_known_devices() -> List[Dict]:
     """Get all devices from database"""
-    with get_db() as conn:
+    with get_db_ro() as conn:
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM devices ORDER BY last_seen DESC")
+        cursor.execute(SQL_SELECT_ALL_DEVICES)
         return [dict(row) for row in cursor.fetchall()]
 
 
-def calculate_device_category(device_data: Dict, is_online: bool = True, recent_streak: int = 0) -> tuple[str, str]:
+def get_all_known_devices_cached() -> List[Dict]:
+    """Get all devices from the in-memory mirror of the devices table"""
+    if _mirror is None:
+        _refresh_devices_mirror()
+
+    with _mirror_lock:
+        cursor = _mirror.execute("SELECT * FROM devices ORDER BY last_seen DESC")
+        return [dict(row) for row in cursor.fetchall()]
+
+
+def _has_streak_bonus(total_scans: int, appearance_rate: float, recent_streak: int) -> bool:
+    """
+    Recent streak bonus: If device has been consistently online recently
+    and has enough history, upgrade to regular.
+    Threshold: 15+ consecutive scans online AND total_scans >= 20
+    """
+    return recent_streak >= 15 and total_scans >= 20 and appearance_rate >= 0.4
+
+
+def category_of(total_scans: int, scans_seen_online: int,
+                is_online: bool = True, recent_streak: int = 0,
+                appearance_rate: Optional[float] = None) -> str:
+    """
+    Category-only version of calculate_device_category() for callers that
+    don't need the reason. Takes the counters directly and builds no strings.
+    """
+    if not is_online:
+        return 'offline'
+
+    # Truly new devices (≤3 scans)
+    if total_scans <= 3:
+        return 'new'
+
+    if appearance_rate is None:
+        appearance_rate = scans_seen_online / total_scans
+
+    # Standard classification with slightly relaxed thresholds
+    if appearance_rate >= 0.65 or _has_streak_bonus(total_scans, appearance_rate, recent_streak):
+        return 'regular'
+    elif appearance_rate >= 0.3:
+        return 'occasional'
+    else:
+        return 'rare'
+
+
+def calculate_device_category(device_data: Dict, is_online: bool = True, recent_streak: int = 0,
+                              appearance_rate: Optional[float] = None) -> tuple[str, str]:
     """
     Calculate device category based on historical data with recent trend weighting.
     Returns (category, reason) for debugging.
@@ -256,61 +685,111 @@ def calculate_device_category(device_data: Dict, is_online: bool = True, recent_
 
     Recent Streak Bonus: If a device is online and has been consistently online
     for the last N scans, it gets upgraded to "regular" even if historical rate is lower.
+
+    Callers that already worked out scans_seen_online / total_scans can pass
+    it as appearance_rate so it isn't computed again.
+    """
+    return _categorize(
+        device_data.get('total_scans', 0),
+        device_data.get('scans_seen_online', 0),
+        is_online,
+        recent_streak,
+        appearance_rate
+    )
+
+
+@lru_cache(maxsize=8192)
+def _categorize(total_scans: int, scans_seen_online: int,
+                is_online: bool, recent_streak: int,
+                appearance_rate: Optional[float] = None) -> tuple[str, str]:
+    """
+    calculate_device_category() on plain counters. Memoized, since the
+    result depends only on these values and they repeat across devices.
     """
-    total_scans = device_data.get('total_scans', 0)
-    scans_seen_online = device_data.get('scans_seen_online', 0)
-    consecutive_offline = device_data.get('consecutive_offline', 0)
+    if appearance_rate is None:
+        appearance_rate = scans_seen_online / total_scans if total_scans > 0 else 0
+    category = category_of(total_scans, scans_seen_online, is_online, recent_streak, appearance_rate)
 
-    # If offline, return offline category
-    if not is_online:
+    if category == 'offline':
         if total_scans == 0:
             return 'offline', 'offline with no history'
-        appearance_rate = scans_seen_online / total_scans if total_scans > 0 else 0
         return 'offline', f'offline (historically {appearance_rate:.0%} appearance)'
 
-    # Truly new devices (≤3 scans)
-    if total_scans <= 3:
+    if category == 'new':
         return 'new', f'new device (seen {total_scans} times)'
 
-    # Calculate appearance rate for established devices
-    appearance_rate = scans_seen_online / total_scans if total_scans > 0 else 0
-
-    # Recent streak bonus: If device has been consistently online recently
-    # and has enough history, upgrade to regular
-    # Threshold: 15+ consecutive scans online AND total_scans >= 20
-    if recent_streak >= 15 and total_scans >= 20 and appearance_rate >= 0.4:
+    if category == 'regular' and _has_streak_bonus(total_scans, appearance_rate, recent_streak):
         return 'regular', f'regular device (recent streak: {recent_streak} scans, {appearance_rate:.0%} historical)'
 
-    # Standard classification with slightly relaxed thresholds
-    if appearance_rate >= 0.65:  # Lowered from 0.7 to 0.65
-        return 'regular', f'regular device ({appearance_rate:.0%} appearance)'
-    elif appearance_rate >= 0.3:
-        return 'occasional', f'occasional device ({appearance_rate:.0%} appearance)'
-    else:
-        return 'rare', f'rare device ({appearance_rate:.0%} appearance)'
+    return category, f'{category} device ({appearance_rate:.0%} appearance)'
+
+
+def batch_categorize(devices: Optional[List[Dict]] = None) -> Dict[str, str]:
+    """
+    Categorize many devices in one pass, keyed by IP.
+
+    Uses the given device rows if provided, otherwise reads only the
+    counters it needs from the devices table in a single query.
+    """
+    if devices is None:
+        with get_db_ro() as conn:
+            devices = conn.execute(SQL_SELECT_CATEGORY_COUNTERS).fetchall()
+
+    return {
+        d['ip']: category_of(d['total_scans'], d['scans_seen_online'])
+        for d in devices
+    }
 
 
 def log_categorization(scan_id: int, ip: str, hostname: str, total_scans: int,
                        scans_seen_online: int, appearance_rate: float,
-                       category: str, device_status: str, reason: str):
+                       category: str, device_status: str, reason: str,
+                       now: Optional[str] = None):
     """Log device categorization decision"""
+    if now is None:
+        now = datetime.now().isoformat()
     with get_db() as conn:
         cursor = conn.cursor()
-        cursor.execute("""
-            INSERT INTO categorization_log (
-                scan_id, ip, hostname, total_scans, scans_seen_online,
-                appearance_rate, category, device_status, reason, timestamp
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
+        cursor.execute(SQL_INSERT_CAT_LOG, (
             scan_id, ip, hostname, total_scans, scans_seen_online,
-            appearance_rate, category, device_status, reason,
-            datetime.now().isoformat()
+            appearance_rate, category, device_status, reason, now
         ))
 
 
+def bulk_log_categorization(rows: List[Tuple]):
+    """
+    Log many categorization decisions in a single transaction.
+
+    Args:
+        rows: (scan_id, ip, hostname, total_scans, scans_seen_online,
+               appearance_rate, category, device_status, reason, timestamp) tuples
+    """
+    if not rows:
+        return
+
+    with get_db() as conn:
+        conn.executemany(SQL_INSERT_CAT_LOG, rows)
+
+
+def prune_categorization_log(retention_days: int = CATEGORIZATION_LOG_RETENTION_DAYS):
+    """Delete categorization log entries older than retention_days"""
+    global _last_prune
+    _last_prune = time.monotonic()
+    cutoff = (datetime.now() - timedelta(days=retention_days)).isoformat()
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM categorization_log WHERE timestamp < ?", (cutoff,))
+        deleted = cursor.rowcount
+
+    if deleted:
+        logger.info(f"Pruned {deleted} categorization log entries older than {retention_days} days")
+        # Release the freed pages (no-op unless auto_vacuum=INCREMENTAL)
+        _get_connection().execute("PRAGMA incremental_vacuum").fetchall()
+
+
 def get_categorization_log(limit: int = 100) -> List[Dict]:
     """Get recent categorization log entries"""
-    with get_db() as conn:
+    with get_db_ro() as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT * FROM categorization_log
@@ -320,9 +799,10 @@ def get_categorization_log(limit: int = 100) -> List[Dict]:
         return [dict(row) for row in cursor.fetchall()]
 
 
-def update_device_notes(ip: str, notes: str):
+def update_device_notes(ip: str, notes: str, now: Optional[str] = None):
     """Update notes for a device"""
-    now = datetime.now().isoformat()
+    if now is None:
+        now = datetime.now().isoformat()
     with get_db() as conn:
         cursor = conn.cursor()
         cursor.execute("""
@@ -330,10 +810,18 @@ def update_device_notes(ip: str, notes: str):
             WHERE ip = ?
         """, (notes, now, ip))
 
+    _refresh_devices_mirror()
 
-def get_database_stats() -> Dict:
-    """Get database statistics"""
-    with get_db() as conn:
+
+# active_24h also depends on the clock, not just on writes, so the stats
+# cache is keyed on the current minute as well; without scans running,
+# devices still age out of the 24h window within a minute
+STATS_CACHE_SECONDS = 60
+
+
+@lru_cache(maxsize=1)
+def _database_stats_at(scans_version: int, devices_version: int, time_bucket: int) -> Dict:
+    with get_db_ro() as conn:
         cursor = conn.cursor()
 
         cursor.execute("SELECT COUNT(*) as count FROM devices")
@@ -342,10 +830,13 @@ def get_database_stats() -> Dict:
         cursor.execute("SELECT COUNT(*) as count FROM scans")
         total_scans = cursor.fetchone()['count']
 
+        # Timestamps are stored as ISO-8601 strings, which sort
+        # chronologically, so a plain string compare can use the index
+        cutoff = (datetime.now() - timedelta(days=1)).isoformat()
         cursor.execute("""
             SELECT COUNT(*) as count FROM devices
-            WHERE datetime(last_seen_online) > datetime('now', '-1 day')
-        """)
+            WHERE last_seen_online > ?
+        """, (cutoff,))
         active_24h = cursor.fetchone()['count']
 
         return {
@@ -355,26 +846,27 @@ def get_database_stats() -> Dict:
         }
 
 
-def save_port_scan_results(ip: str, results: List[Dict], pihole_info: Dict = None):
+def get_database_stats() -> Dict:
+    """Get database statistics"""
+    return dict(_database_stats_at(
+        _cache_version["scans"], _cache_version["devices"], int(time.time() // STATS_CACHE_SECONDS)
+    ))
+
+
+def save_port_scan_results(ip: str, results: List[Dict], pihole_info: Dict = None,
+                           now: Optional[str] = None):
     """Save port scan results to database"""
-    now = datetime.now().isoformat()
+    if now is None:
+        now = datetime.now().isoformat()
     with get_db() as conn:
         cursor = conn.cursor()
-        for result in results:
-            cursor.execute("""
-                INSERT OR REPLACE INTO port_scans (ip, port, status, service, scan_time)
-                VALUES (?, ?, ?, ?, ?)
-            """, (ip, result['port'], result['status'], result.get('service', ''), now))
+        cursor.executemany(SQL_UPSERT_PORT_SCAN, [
+            (ip, result['port'], result['status'], result.get('service', ''), now)
+            for result in results
+        ])
 
-        # Save Pi-hole info if detected
+        # Save Pi-hole info if detected (columns are created by init_database)
         if pihole_info:
-            # Add pihole_detected column to devices table if it doesn't exist
-            try:
-                cursor.execute("ALTER TABLE devices ADD COLUMN pihole_detected INTEGER DEFAULT 0")
-                cursor.execute("ALTER TABLE devices ADD COLUMN pihole_admin_url TEXT")
-            except:
-                pass  # Column already exists
-
             cursor.execute("""
                 UPDATE devices
                 SET pihole_detected = 1,
@@ -386,34 +878,29 @@ def save_port_scan_results(ip: str, results: List[Dict], pihole_info: Dict = Non
 
 def get_latest_port_scan(ip: str) -> Optional[Dict]:
     """Get the most recent port scan results for an IP"""
-    with get_db() as conn:
+    with get_db_ro() as conn:
         cursor = conn.cursor()
 
-        # Get the latest scan time
-        cursor.execute("""
-            SELECT MAX(scan_time) as latest_scan
-            FROM port_scans
-            WHERE ip = ?
-        """, (ip,))
-        row = cursor.fetchone()
-
-        if not row or not row['latest_scan']:
-            return None
-
-        latest_scan = row['latest_scan']
-
-        # Get all ports from that scan
+        # Fetch every port from the latest scan in one query; the
+        # (ip, scan_time) index serves both the MAX() and the lookup
         cursor.execute("""
-            SELECT port, status, service
+            SELECT scan_time, port, status, service
             FROM port_scans
-            WHERE ip = ? AND scan_time = ?
+            WHERE ip = ? AND scan_time = (
+                SELECT MAX(scan_time) FROM port_scans WHERE ip = ?
+            )
             ORDER BY port
-        """, (ip, latest_scan))
+        """, (ip, ip))
+        rows = cursor.fetchall()
 
-        ports = [dict(row) for row in cursor.fetchall()]
+        if not rows:
+            return None
 
         return {
             'ip': ip,
-            'scan_time': latest_scan,
-            'ports': ports
+            'scan_time': rows[0]['scan_time'],
+            'ports': [
+                {'port': row['port'], 'status': row['status'], 'service': row['service']}
+                for row in rows
+            ]
         }
@@ -9,37 +9,40 @@ import os
 import signal
 import subprocess
 import time
+import threading
 from pathlib import Path
 
 try:
-    from watchdog.observers import Observer
-    from watchdog.events import FileSystemEventHandler
+    from watchfiles import watch, PythonFilter
 except ImportError:
-    print("Error: watchdog library not found")
-    print("Installing watchdog...")
-    subprocess.run([sys.executable, "-m", "pip", "install", "watchdog"])
-    from watchdog.observers import Observer
-    from watchdog.events import FileSystemEventHandler
+    print("Error: watchfiles library not found")
+    print("Installing watchfiles...")
+    subprocess.run([sys.executable, "-m", "pip", "install", "watchfiles"])
+    from watchfiles import watch, PythonFilter
 
 
-class BackendRestartHandler(FileSystemEventHandler):
+class BackendRestartHandler:
     def __init__(self, script_dir, debug=False):
         self.script_dir = script_dir
         self.python_path = script_dir / ".venv" / "bin" / "python"
         self.main_path = script_dir / "main.py"
         self.process = None
-        self.restarting = False
-        self.last_restart = 0
-        self.debounce_seconds = 1.0  # Debounce rapid file changes
+        self.process_lock = threading.Lock()
+        self.restart_pending = threading.Event()
+        self.min_restart_interval = 1.0  # Minimum time between restarts
         self.debug = debug
 
         # Start the backend initially
         self.start_backend()
 
-    def on_any_event(self, event):
+        # Restarts happen on their own thread so changes keep being
+        # collected while the backend is going down and coming back up
+        threading.Thread(target=self.restart_worker, daemon=True).start()
+
+    def on_any_event(self, change, path):
         """Log all events in debug mode"""
         if self.debug:
-            print(f"[DEBUG] Event: {event.event_type} | {event.src_path}")
+            print(f"[DEBUG] Event: {change.name} | {path}")
 
     def start_backend(self):
         """Start the FastAPI backend"""
@@ -52,7 +55,8 @@ class BackendRestartHandler(FileSystemEventHandler):
                 [str(self.python_path), str(self.main_path)],
                 cwd=str(self.script_dir),
                 stdout=sys.stdout,
-                stderr=sys.stderr
+                stderr=sys.stderr,
+                start_new_session=True  # Own process group, see stop_backend()
             )
             print(f"✓ Backend started (PID: {self.process.pid})")
         except Exception as e:
@@ -64,76 +68,91 @@ class BackendRestartHandler(FileSystemEventHandler):
         if self.process:
             print("\n🛑 Stopping backend...")
             try:
-                self.process.terminate()
-                self.process.wait(timeout=5)
+                # Signal the whole process group, so anything the backend
+                # spawned (scanner subprocesses etc.) is stopped with it
+                os.killpg(self.process.pid, signal.SIGTERM)
+                if self.wait_for_exit(timeout=5):
+                    print("✓ Backend stopped")
+                else:
+                    print("⚠️  Backend didn't stop gracefully, force killing...")
+                    os.killpg(self.process.pid, signal.SIGKILL)
+                    self.process.wait()
+            except ProcessLookupError:
+                # The whole group had already exited
+                self.process.poll()
                 print("✓ Backend stopped")
-            except subprocess.TimeoutExpired:
-                print("⚠️  Backend didn't stop gracefully, force killing...")
-                self.process.kill()
-                self.process.wait()
             except Exception as e:
                 print(f"✗ Error stopping backend: {e}")
 
-    def restart_backend(self):
-        """Restart the backend with debouncing"""
-        # Debounce: ignore if we just restarted recently
-        current_time = time.time()
-        if current_time - self.last_restart < self.debounce_seconds:
-            return
-
-        if self.restarting:
-            return
-
-        self.restarting = True
-        self.last_restart = current_time
+    def wait_for_exit(self, timeout):
+        """Poll for the backend to exit; returns False if it's still running after timeout seconds"""
+        deadline = time.monotonic() + timeout
+        while self.process.poll() is None:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.1)
+        return True
 
+    def restart_backend(self):
+        """Restart the backend"""
         print("\n🔄 File change detected, restarting...")
 
-        self.stop_backend()
-        time.sleep(0.5)  # Brief pause
-        self.start_backend()
-
-        self.restarting = False
-
-    def should_handle_event(self, event):
-        """Check if we should handle this event"""
-        if event.is_directory:
-            return False
+        with self.process_lock:
+            self.stop_backend()
+            time.sleep(0.5)  # Brief pause
+            self.start_backend()
+
+    def request_restart(self):
+        """Ask for a restart; requests made while one is pending coalesce"""
+        self.restart_pending.set()
+
+    def restart_worker(self):
+        """
+        Restart as soon as the first change comes in, then at most once per
+        min_restart_interval. Changes that arrive during a restart or the
+        interval after it leave restart_pending set, so the last edit always
+        gets a restart of its own instead of being dropped.
+        """
+        while True:
+            self.restart_pending.wait()
+            self.restart_pending.clear()
+            self.restart_backend()
+            time.sleep(self.min_restart_interval)
 
-        # Only handle Python file changes
-        if not event.src_path.endswith('.py'):
-            return False
+    def shutdown(self):
+        """Stop the backend, waiting out any restart in progress"""
+        with self.process_lock:
+            self.stop_backend()
 
-        # Ignore __pycache__ and .venv
-        if '__pycache__' in event.src_path or '.venv' in event.src_path:
-            return False
+    def on_changes(self, changes):
+        """
+        Handle one batch of file changes from watchfiles.
 
-        # Ignore the watch script itself
-        if 'dev-watch.py' in event.src_path:
-            return False
+        Changes have already been filtered down to the Python files we
+        care about (see watch_filter() below), and watchfiles coalesces
+        bursts of events (editors that save via a temp file and rename show
+        up as one batch), so each batch triggers a single restart.
+        """
+        for change, path in changes:
+            self.on_any_event(change, path)
 
-        return True
+        names = ", ".join(sorted({Path(path).name for _, path in changes}))
+        print(f"\n📝 Changed: {names}")
+        self.request_restart()
 
-    def on_modified(self, event):
-        """Handle file modification events"""
-        if self.should_handle_event(event):
-            print(f"\n📝 Modified: {Path(event.src_path).name}")
-            self.restart_backend()
 
-    def on_created(self, event):
-        """Handle file creation events"""
-        if self.should_handle_event(event):
-            print(f"\n📝 Created: {Path(event.src_path).name}")
-            self.restart_backend()
+def watch_filter(script_dir):
+    """
+    Only Python files, skipping the venv, bytecode caches and this script.
 
-    def on_moved(self, event):
-        """Handle file move/rename events (common with editors like VS Code, vim)"""
-        # Check destination path for moves (editors often save as temp then rename)
-        if hasattr(event, 'dest_path'):
-            if event.dest_path.endswith('.py'):
-                if '__pycache__' not in event.dest_path and '.venv' not in event.dest_path:
-                    print(f"\n📝 Updated (via rename): {Path(event.dest_path).name}")
-                    self.restart_backend()
+    The filter runs before a change is added to a batch, so edits under
+    .venv (pip installs and the like) never wake the restart handler.
+    """
+    return PythonFilter(ignore_paths=[
+        script_dir / ".venv",
+        script_dir / "__pycache__",
+        script_dir / "dev-watch.py",
+    ])
 
 
 def main():
@@ -157,11 +176,9 @@ def main():
     print("Press Ctrl+C to stop")
     print("=" * 60)
 
-    # Create event handler and observer
+    # Create event handler; watchfiles uses the OS's native notification API
+    # (inotify/FSEvents) from Rust and hands us batches of changes
     event_handler = BackendRestartHandler(script_dir, debug=debug)
-    observer = Observer()
-    observer.schedule(event_handler, str(script_dir), recursive=True)
-    observer.start()
 
     print("\n✓ Watch mode active - edit any Python file to trigger restart")
     if debug:
@@ -169,16 +186,13 @@ def main():
     print()
 
     try:
-        while True:
-            time.sleep(1)
+        for changes in watch(script_dir, watch_filter=watch_filter(script_dir), debounce=500):
+            event_handler.on_changes(changes)
     except KeyboardInterrupt:
         print("\n\n🛑 Shutting down watch mode...")
-        observer.stop()
-        event_handler.stop_backend()
+        event_handler.shutdown()
         print("✓ Stopped")
 
-    observer.join()
-
 
 if __name__ == "__main__":
     main()
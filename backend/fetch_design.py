@@ -5,6 +5,17 @@ import urllib.request
 import re
 from html.parser import HTMLParser
 
+# Optional C-backed parsers; html.parser is the pure-Python fallback
+try:
+    from selectolax.parser import HTMLParser as FastHTMLParser
+except ImportError:
+    FastHTMLParser = None
+
+try:
+    import lxml.html as lxml_html
+except ImportError:
+    lxml_html = None
+
 class StyleParser(HTMLParser):
     def __init__(self):
         super().__init__()
@@ -28,6 +39,39 @@ class StyleParser(HTMLParser):
         if tag == 'style':
             self.in_style = False
 
+def extract_styles(html):
+    """
+    Return (style block contents, body classes) using the fastest parser available.
+
+    Takes the raw page bytes; only the html.parser fallback needs them decoded.
+    """
+    if FastHTMLParser is not None:
+        tree = FastHTMLParser(html)
+        body = tree.css_first('body')
+        body_classes = (body.attributes.get('class') or '').split() if body else []
+        return [node.text() for node in tree.css('style')], body_classes
+
+    if lxml_html is not None:
+        tree = lxml_html.fromstring(html)
+        return tree.xpath('//style/text()'), tree.xpath('string(//body/@class)').split()
+
+    parser = StyleParser()
+    parser.feed(html.decode('utf-8', errors='replace'))
+    return parser.styles, parser.body_classes
+
+# One pass over the page for every property we report on; the named group
+# that matched says which list the value belongs to. Values end at the
+# declaration's ';' or the rule's closing '}', so a match never runs on into
+# the next rule and swallows its declarations.
+CSS_PROPERTY_PATTERN = re.compile(
+    rb'font-family:\s*(?P<font>[^;}]+)[;}]'
+    rb'|font-size:\s*(?P<size>[^;}]+)[;}]'
+    rb'|(?:color|background-color|border-color):\s*(?P<color>#[0-9a-fA-F]{3,6}|rgb[a]?\([^)]+\)|[a-z]+)[;}]'
+    rb'|(?:margin|padding):\s*(?P<spacing>[^;}]+)[;}]'
+)
+
+LAYOUT_PATTERN = re.compile(rb'container|grid|flex', re.IGNORECASE)
+
 url = 'https://usgraphics.com/'
 headers = {
     'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
@@ -37,8 +81,10 @@ try:
     print(f"Fetching {url}...")
     req = urllib.request.Request(url, headers=headers)
 
+    # Keep the page as bytes; the parsers and patterns below all work on
+    # bytes, so it's never decoded as a whole
     with urllib.request.urlopen(req, timeout=10) as response:
-        html = response.read().decode('utf-8')
+        html = response.read()
 
     print(f"✓ Fetched {len(html)} bytes")
     print("\n" + "="*60)
@@ -46,46 +92,50 @@ try:
     print("="*60)
 
     # Parse styles
-    parser = StyleParser()
-    parser.feed(html)
+    styles, body_classes = extract_styles(html)
 
     # Extract key design elements
     print("\n1. CSS STYLES FOUND:")
     print("-" * 60)
-    for i, style in enumerate(parser.styles[:3], 1):  # First 3 style blocks
+    for i, style in enumerate(styles[:3], 1):  # First 3 style blocks
         print(f"\nStyle block {i}:")
         print(style[:500])  # First 500 chars
         if len(style) > 500:
             print("... (truncated)")
 
+    # Extract every property value in a single scan
+    properties = {'font': [], 'size': [], 'color': [], 'spacing': []}
+    for match in CSS_PROPERTY_PATTERN.finditer(html):
+        properties[match.lastgroup].append(match.group(match.lastgroup).decode('utf-8', errors='replace'))
+
     # Extract font families
     print("\n\n2. FONT FAMILIES:")
     print("-" * 60)
-    fonts = re.findall(r'font-family:\s*([^;]+);', html)
-    for font in set(fonts[:5]):
+    fonts = properties['font']
+    for font in dict.fromkeys(fonts[:5]):
         print(f"  - {font}")
 
     # Extract color scheme
     print("\n\n3. COLOR PALETTE:")
     print("-" * 60)
-    colors = re.findall(r'(?:color|background-color|border-color):\s*(#[0-9a-fA-F]{3,6}|rgb[a]?\([^)]+\)|[a-z]+);', html)
-    unique_colors = list(set(colors[:20]))
+    colors = properties['color']
+    unique_colors = list(dict.fromkeys(colors[:20]))
     for color in unique_colors:
         print(f"  - {color}")
 
     # Extract font sizes
     print("\n\n4. FONT SIZES:")
     print("-" * 60)
-    sizes = re.findall(r'font-size:\s*([^;]+);', html)
-    unique_sizes = list(set(sizes[:15]))
+    sizes = properties['size']
+    unique_sizes = list(dict.fromkeys(sizes[:15]))
     for size in unique_sizes:
         print(f"  - {size}")
 
     # Extract spacing
     print("\n\n5. SPACING/PADDING:")
     print("-" * 60)
-    spacing = re.findall(r'(?:margin|padding):\s*([^;]+);', html)
-    unique_spacing = list(set(spacing[:15]))
+    spacing = properties['spacing']
+    unique_spacing = list(dict.fromkeys(spacing[:15]))
     for space in unique_spacing:
         print(f"  - {space}")
 
@@ -94,25 +144,26 @@ try:
     print("-" * 60)
 
     # Find main content area
-    main_match = re.search(r'<main[^>]*>(.*?)</main>', html, re.DOTALL)
+    main_match = re.search(rb'<main[^>]*>(.*?)</main>', html, re.DOTALL)
     if main_match:
         print("✓ Has <main> tag")
 
-    # Check for common layout patterns
-    if 'container' in html.lower():
+    # Check for common layout patterns, without lowercasing the whole page
+    layouts = {m.lower() for m in LAYOUT_PATTERN.findall(html)}
+    if b'container' in layouts:
         print("✓ Uses container pattern")
-    if 'grid' in html.lower():
+    if b'grid' in layouts:
         print("✓ Uses grid layout")
-    if 'flex' in html.lower():
+    if b'flex' in layouts:
         print("✓ Uses flexbox")
 
     # Save full HTML for reference
-    with open('/tmp/usgraphics.html', 'w') as f:
+    with open('/tmp/usgraphics.html', 'wb') as f:
         f.write(html)
     print(f"\n✓ Full HTML saved to /tmp/usgraphics.html")
 
     # Extract and save just the CSS
-    all_css = '\n\n'.join(parser.styles)
+    all_css = '\n\n'.join(styles)
     with open('/tmp/usgraphics.css', 'w') as f:
         f.write(all_css)
     print(f"✓ CSS saved to /tmp/usgraphics.css")
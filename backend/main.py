@@ -1,24 +1,27 @@
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from network_scanner import scan_network
-from port_scanner import scan_ports
-from pi_hole_detector import check_if_pihole
+from port_scanner import scan_ports_async
+from pi_hole_detector import check_if_pihole, close_session as close_pihole_session
 from database import (
-    init_database, update_device, increment_total_scans,
-    get_device_history, get_all_known_devices, calculate_device_category,
+    init_database,
+    get_device_histories, get_all_known_devices_cached, calculate_device_category, batch_categorize,
+    project_device_history, persist_scan,
     record_scan, get_database_stats, get_total_scans, update_device_notes,
-    log_categorization, get_categorization_log, save_port_scan_results,
-    get_latest_port_scan
+    get_categorization_log, save_port_scan_results,
+    get_latest_port_scan, close_db
 )
 import uvicorn
 import logging
 import sys
 import os
 import asyncio
-import json
-from typing import List, Set
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Set
+from dataclasses import asdict
 from datetime import datetime, timedelta
-import threading
 
 # Configure logging
 logging.basicConfig(
@@ -43,7 +46,7 @@ if sys.platform == "darwin":
         logger.warning("For full network scanning, run: sudo python main.py")
         logger.warning("=" * 60)
 
-app = FastAPI(title="Local Network Device Control Plane")
+app = FastAPI(title="Local Network Device Control Plane", default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -53,24 +56,49 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global state
+# Global state. Only ever read and written from the event loop thread
+# (scans run in an executor but hand their results back to the loop), so
+# it needs no locking.
 class ScannerState:
     def __init__(self):
-        self.devices = []
+        self.devices = ()  # Immutable snapshot, replaced wholesale after each scan
+        # Devices seen online in the last scan. Rebound to a fresh list after
+        # every scan and never mutated in place; compare_devices() only reads
+        # it and copies a device before changing it, so no snapshot is needed
         self.previous_devices = []
         self.last_scan = None
         self.next_scan = None
         self.scanning = False
         self.scan_interval = 30  # seconds
-        self.lock = threading.Lock()
+        self.persist_future = None  # Pending persist_scan() of the last scan
+        self.scan_task = None  # Scan in progress, shared by overlapping requests
+        self.last_broadcast_by_ip = {}  # Devices as of the last scan_delta, keyed by IP
+        # Network scans get their own thread rather than the shared default
+        # executor; there's only ever one to run at a time
+        self.scan_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="scan")
         self.active_connections: Set[WebSocket] = set()
 
+    def message(self, message_type: str, **fields) -> dict:
+        """
+        Build a WebSocket message carrying the scan schedule, shared by
+        initial_state and scan_delta. fields add the message's payload.
+        """
+        message = {
+            "type": message_type,
+            "timestamp": self.last_scan,
+            "next_scan": self.next_scan,
+            "scan_interval": self.scan_interval,
+            "scanning": self.scanning
+        }
+        message.update(fields)
+        return message
+
 state = ScannerState()
 
-def compare_devices(current_devices, previous_devices, scan_id: int, grace_scans=3):
+def compare_devices(current_devices, previous_devices, histories, scan_id: int, now: str, grace_scans=3):
     """
     Compare current scan with previous scan to detect changes.
-    Uses database to track device history and categorize devices.
+    Uses device history to track and categorize devices.
 
     Simplified categories:
     - new: Truly new device (≤3 scans)
@@ -80,68 +108,66 @@ def compare_devices(current_devices, previous_devices, scan_id: int, grace_scans
     - offline: Currently not responding (after grace period)
 
     Grace period: Devices aren't marked offline until they miss grace_scans consecutive scans.
-    """
-    # Increment total scan counter for all known devices
-    increment_total_scans()
 
-    # Create lookup by IP address
+    Pure: neither the database nor the input device dicts are touched.
+    histories maps IP to get_device_histories() rows read after this scan
+    was recorded, and now is the scan's ISO timestamp.
+
+    Returns (devices, device_rows, cat_rows, counts); device_rows and
+    cat_rows are what persist_scan() writes for this scan, and counts holds
+    the number of devices categorized 'new' and shown as 'offline'.
+    """
+    # Create lookup by IP address; the current side only needs membership
     prev_ips = {d['ip']: d for d in previous_devices}
-    curr_ips = {d['ip']: d for d in current_devices}
-    now = datetime.now()
+    curr_ip_set = {d['ip'] for d in current_devices}
+
+    # Rows for the device table, online and offline
+    device_rows = [(d['ip'], d['mac'], d['hostname'], True) for d in current_devices]
+    device_rows.extend(
+        (ip, d.get('mac', 'unknown'), d.get('hostname', 'Unknown'), False)
+        for ip, d in prev_ips.items() if ip not in curr_ip_set
+    )
 
     result = []
+    # Categorization log rows
+    cat_rows = []
+    counts = {'new': 0, 'offline': 0}
 
     # Process currently online devices
     for device in current_devices:
         ip = device['ip']
-        mac = device['mac']
         hostname = device['hostname']
 
-        # Update database
-        update_device(ip, mac, hostname, is_online=True)
-
-        # Get device history
-        history = get_device_history(ip)
+        # History as it will be once this scan is persisted
+        history = project_device_history(histories.get(ip), is_online=True, now=now)
 
         # Calculate category with reason (online device)
         # Pass consecutive_online for streak-based upgrades
-        if history:
-            recent_streak = history.get('consecutive_online', 0)
-            category, reason = calculate_device_category(history, is_online=True, recent_streak=recent_streak)
-        else:
-            category, reason = 'new', 'no history yet'
+        recent_streak = history.get('consecutive_online', 0)
+        appearance_rate = history['scans_seen_online'] / history['total_scans'] if history['total_scans'] > 0 else 0
+        category, reason = calculate_device_category(
+            history, is_online=True, recent_streak=recent_streak, appearance_rate=appearance_rate
+        )
 
         # Add enriched data
+        device = dict(device)
         device['category'] = category
         device['status'] = 'online'
-        device['last_seen'] = now.isoformat()
+        if category == 'new':
+            counts['new'] += 1
+        device['last_seen'] = now
         device['missed_scans'] = 0
-
-        if history:
-            device['first_seen'] = history['first_seen']
-            device['total_scans'] = history['total_scans']
-            device['scans_seen_online'] = history['scans_seen_online']
-            device['appearance_rate'] = history['scans_seen_online'] / history['total_scans'] if history['total_scans'] > 0 else 0
-            device['notes'] = history.get('notes', '')
-        else:
-            device['first_seen'] = now.isoformat()
-            device['total_scans'] = 1
-            device['scans_seen_online'] = 1
-            device['appearance_rate'] = 1.0
-            device['notes'] = ''
+        device['first_seen'] = history['first_seen']
+        device['total_scans'] = history['total_scans']
+        device['scans_seen_online'] = history['scans_seen_online']
+        device['appearance_rate'] = appearance_rate
+        device['notes'] = history.get('notes', '')
 
         # Log categorization decision
-        log_categorization(
-            scan_id=scan_id,
-            ip=ip,
-            hostname=hostname,
-            total_scans=device['total_scans'],
-            scans_seen_online=device['scans_seen_online'],
-            appearance_rate=device['appearance_rate'],
-            category=category,
-            device_status='online',
-            reason=reason
-        )
+        cat_rows.append((
+            scan_id, ip, hostname, device['total_scans'], device['scans_seen_online'],
+            device['appearance_rate'], category, 'online', reason, now
+        ))
 
         logger.info(f"[CATEGORIZATION] {ip} ({hostname}): {category} | total={device['total_scans']} online={device['scans_seen_online']} rate={device['appearance_rate']:.2%} | reason: {reason}")
 
@@ -149,58 +175,190 @@ def compare_devices(current_devices, previous_devices, scan_id: int, grace_scans
 
     # Handle devices that weren't found in current scan (offline devices)
     for ip, prev_device in prev_ips.items():
-        if ip not in curr_ips:
-            # Update database (mark as seen but offline)
-            update_device(
-                ip,
-                prev_device.get('mac', 'unknown'),
-                prev_device.get('hostname', 'Unknown'),
-                is_online=False
-            )
-
-            # Get updated history
-            history = get_device_history(ip)
-
-            # Increment missed scans counter
-            missed_scans = prev_device.get('missed_scans', 0) + 1
+        if ip not in curr_ip_set:
+            # Increment missed scans counter (previous devices are always enriched)
+            missed_scans = prev_device['missed_scans'] + 1
 
             # Only show offline devices after grace period
             if missed_scans >= grace_scans:
+                history = project_device_history(histories.get(ip), is_online=False, now=now)
+
                 offline_device = prev_device.copy()
                 offline_device['status'] = 'offline'
+                counts['offline'] += 1
                 offline_device['missed_scans'] = missed_scans
 
                 # Calculate category for offline device
-                if history:
-                    category, reason = calculate_device_category(history, is_online=False)
-                    offline_device['category'] = category
-                    offline_device['total_scans'] = history['total_scans']
-                    offline_device['scans_seen_online'] = history['scans_seen_online']
-                    offline_device['appearance_rate'] = history['scans_seen_online'] / history['total_scans'] if history['total_scans'] > 0 else 0
-                    offline_device['notes'] = history.get('notes', '')
-
-                    # Log categorization for offline device
-                    log_categorization(
-                        scan_id=scan_id,
-                        ip=ip,
-                        hostname=prev_device.get('hostname', 'Unknown'),
-                        total_scans=offline_device['total_scans'],
-                        scans_seen_online=offline_device['scans_seen_online'],
-                        appearance_rate=offline_device['appearance_rate'],
-                        category=category,
-                        device_status='offline',
-                        reason=f"OFFLINE (missed {missed_scans} scans) | {reason}"
-                    )
-
-                    logger.info(f"[CATEGORIZATION] {ip} ({prev_device.get('hostname', 'Unknown')}): {category} | total={offline_device['total_scans']} online={offline_device['scans_seen_online']} rate={offline_device['appearance_rate']:.2%} | reason: {reason}")
+                appearance_rate = history['scans_seen_online'] / history['total_scans'] if history['total_scans'] > 0 else 0
+                category, reason = calculate_device_category(history, is_online=False, appearance_rate=appearance_rate)
+                offline_device['category'] = category
+                offline_device['total_scans'] = history['total_scans']
+                offline_device['scans_seen_online'] = history['scans_seen_online']
+                offline_device['appearance_rate'] = appearance_rate
+                offline_device['notes'] = history.get('notes', '')
+
+                # Log categorization for offline device
+                cat_rows.append((
+                    scan_id, ip, prev_device.get('hostname', 'Unknown'),
+                    offline_device['total_scans'], offline_device['scans_seen_online'],
+                    offline_device['appearance_rate'], category, 'offline',
+                    f"OFFLINE (missed {missed_scans} scans) | {reason}", now
+                ))
+
+                logger.info(f"[CATEGORIZATION] {ip} ({prev_device.get('hostname', 'Unknown')}): {category} | total={offline_device['total_scans']} online={offline_device['scans_seen_online']} rate={offline_device['appearance_rate']:.2%} | reason: {reason}")
 
                 result.append(offline_device)
             else:
                 # Keep device in list but increment missed counter
-                prev_device['missed_scans'] = missed_scans
-                result.append(prev_device)
+                grace_device = prev_device.copy()
+                grace_device['missed_scans'] = missed_scans
+                result.append(grace_device)
+
+    return result, device_rows, cat_rows, counts
+
+def categorize_scan(current_devices, previous_devices, scan_id: int, now: str):
+    """Load the stored history for every device involved and run compare_devices() on it"""
+    histories = get_device_histories([d['ip'] for d in current_devices + previous_devices])
+    return compare_devices(current_devices, previous_devices, histories, scan_id=scan_id, now=now)
+
+# Fields that change on every scan for every device. Leaving them out of the
+# change check keeps scan_delta down to devices that actually changed; the
+# live device table doesn't show them, and the database view reads them
+# from /api/database/stats.
+DELTA_IGNORED_FIELDS = frozenset({'last_seen', 'total_scans', 'scans_seen_online', 'appearance_rate'})
 
-    return result
+def diff_devices(previous_by_ip, current_by_ip):
+    """
+    Compare two device lists keyed by IP.
+
+    Returns (added, removed, updated): devices new to current_by_ip, IPs no
+    longer in it, and devices whose fields (other than DELTA_IGNORED_FIELDS)
+    changed.
+    """
+    added = []
+    updated = []
+    for ip, device in current_by_ip.items():
+        previous = previous_by_ip.get(ip)
+        if previous is None:
+            added.append(device)
+        elif any(
+            previous.get(key) != value
+            for key, value in device.items() if key not in DELTA_IGNORED_FIELDS
+        ) or previous.keys() != device.keys():
+            updated.append(device)
+
+    removed = [ip for ip in previous_by_ip if ip not in current_by_ip]
+    return added, removed, updated
+
+async def wait_for_persist():
+    """Wait for the previous scan's background database writes to finish"""
+    if state.persist_future is None:
+        return
+    try:
+        await state.persist_future
+    except Exception as e:
+        logger.error(f"Failed to persist scan: {e}")
+    finally:
+        state.persist_future = None
+
+
+async def perform_scan(manual: bool = False):
+    """
+    Scan the network, update state and broadcast the results.
+
+    Used by both the background scanner and manual scan requests. If a scan
+    is already running, this waits for it instead of starting another, so
+    overlapping requests share a single scan.
+    """
+    if state.scan_task is None or state.scan_task.done():
+        state.scan_task = asyncio.create_task(_run_scan(manual))
+
+    # Shielded so a client disconnecting mid-scan doesn't cancel it for everyone
+    await asyncio.shield(state.scan_task)
+
+async def _run_scan(manual: bool):
+    """Body of perform_scan(); errors are reported to clients, not raised"""
+    try:
+        logger.info("Performing manual network scan..." if manual else "Performing network scan...")
+        state.scanning = True
+
+        # Notify clients that scan is starting
+        await broadcast({
+            "type": "scan_start",
+            "message": "Manual scan requested..." if manual else "Starting network scan..."
+        })
+
+        # Run scan in thread pool to not block event loop. IPs already in the
+        # database win when several share a MAC, so the kept one is stable
+        known_ips = {d['ip'] for d in await asyncio.to_thread(get_all_known_devices_cached)}
+        loop = asyncio.get_event_loop()
+        devices = await loop.run_in_executor(state.scan_executor, scan_network, known_ips)
+
+        # One timestamp for every row this scan writes
+        scan_time = datetime.now().isoformat()
+
+        # The previous scan's writes have to land before reading history
+        await wait_for_persist()
+
+        # Record scan in database and get scan_id
+        scan_id = await asyncio.to_thread(record_scan, len(devices), scan_method="scapy", now=scan_time)
+
+        # Compare with previous scan to detect changes. The history fetch and
+        # the categorization loop both run in a worker thread so pings and
+        # other broadcasts keep flowing while the scan is finalized
+        devices_with_status, device_rows, cat_rows, counts = await asyncio.to_thread(
+            categorize_scan, devices, state.previous_devices, scan_id, scan_time
+        )
+
+        # Write the results off the event loop; broadcasting doesn't wait for it
+        state.persist_future = loop.run_in_executor(None, persist_scan, device_rows, cat_rows, scan_time)
+
+        new_count = counts['new']
+        offline_count = counts['offline']
+
+        # Store the devices seen in this scan for next comparison
+        state.previous_devices = [d for d in devices_with_status if d['missed_scans'] == 0]
+        state.devices = tuple(devices_with_status)
+        state.last_scan = datetime.now()
+        # Manual scans don't move the schedule - the background scanner controls it
+        if not manual:
+            state.next_scan = state.last_scan + timedelta(seconds=state.scan_interval)
+        state.scanning = False
+
+        logger.info(f"Scan complete: {len(devices)} online, {new_count} new, {offline_count} offline")
+
+        # Send progress message
+        await broadcast({
+            "type": "scan_progress",
+            "message": (
+                f"Manual scan complete: {len(devices)} online, {new_count} new, {offline_count} offline"
+                if manual else
+                f"Scan complete: {len(devices)} devices online, {new_count} new, {offline_count} offline"
+            )
+        })
+
+        # Broadcast only what changed since the last scan to all connected
+        # WebSocket clients; they get the full list in initial_state
+        devices_by_ip = {d['ip']: d for d in devices_with_status}
+        added, removed, updated = diff_devices(state.last_broadcast_by_ip, devices_by_ip)
+        state.last_broadcast_by_ip = devices_by_ip
+        await broadcast(state.message(
+            "scan_delta",
+            added=added,
+            removed=removed,
+            updated=updated,
+            count=len(devices),
+            new_count=new_count,
+            offline_count=offline_count
+        ))
+
+    except Exception as e:
+        logger.error(f"Error in network scan: {e}")
+        state.scanning = False
+        await broadcast({
+            "type": "scan_error",
+            "message": f"Scan error: {str(e)}"
+        })
 
 # Background scanning task
 async def continuous_scanner(interval: int = 30):
@@ -209,83 +367,30 @@ async def continuous_scanner(interval: int = 30):
     state.scan_interval = interval
 
     while True:
-        try:
-            logger.info("Performing network scan...")
-            state.scanning = True
-
-            # Notify clients that scan is starting
-            if state.active_connections:
-                await broadcast({
-                    "type": "scan_start",
-                    "message": "Starting network scan..."
-                })
-
-            # Run scan in thread pool to not block event loop
-            loop = asyncio.get_event_loop()
-            devices = await loop.run_in_executor(None, scan_network)
-
-            # Record scan in database and get scan_id
-            scan_id = record_scan(len(devices), scan_method="scapy")
-
-            # Compare with previous scan to detect changes
-            devices_with_status = compare_devices(devices, state.previous_devices, scan_id=scan_id)
-
-            # Count changes
-            new_count = sum(1 for d in devices_with_status if d.get('device_status') == 'new')
-            offline_count = sum(1 for d in devices_with_status if d.get('device_status') == 'offline')
-
-            with state.lock:
-                state.previous_devices = devices.copy()  # Store for next comparison
-                state.devices = devices_with_status
-                state.last_scan = datetime.now()
-                state.next_scan = state.last_scan + timedelta(seconds=interval)
-                state.scanning = False
-
-            logger.info(f"Scan complete: {len(devices)} online, {new_count} new, {offline_count} offline")
-
-            # Send progress message
-            if state.active_connections:
-                await broadcast({
-                    "type": "scan_progress",
-                    "message": f"Scan complete: {len(devices)} devices online, {new_count} new, {offline_count} offline"
-                })
-
-            # Broadcast final results to all connected WebSocket clients
-            if state.active_connections:
-                message = {
-                    "type": "scan_update",
-                    "devices": devices_with_status,
-                    "count": len(devices),
-                    "new_count": new_count,
-                    "offline_count": offline_count,
-                    "timestamp": state.last_scan.isoformat(),
-                    "next_scan": state.next_scan.isoformat(),
-                    "scan_interval": interval,
-                    "scanning": False
-                }
-                await broadcast(message)
-
-        except Exception as e:
-            logger.error(f"Error in continuous scanner: {e}")
-            state.scanning = False
-            if state.active_connections:
-                await broadcast({
-                    "type": "scan_error",
-                    "message": f"Scan error: {str(e)}"
-                })
+        await perform_scan()
 
         # Wait for next scan
         await asyncio.sleep(interval)
 
+# Upper bound on concurrent WebSocket clients; further connections are
+# turned away with 1013 (Try Again Later)
+MAX_CONNECTIONS = 50
+
 async def broadcast(message: dict):
     """Broadcast message to all connected WebSocket clients"""
-    disconnected = set()
+    # Encode once and send to every client concurrently, so one slow
+    # client doesn't hold up the rest
+    payload = orjson.dumps(message).decode()
+    connections = list(state.active_connections)
+    results = await asyncio.gather(
+        *(connection.send_text(payload) for connection in connections),
+        return_exceptions=True
+    )
 
-    for connection in state.active_connections:
-        try:
-            await connection.send_json(message)
-        except Exception as e:
-            logger.warning(f"Failed to send to client: {e}")
+    disconnected = set()
+    for connection, result in zip(connections, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Failed to send to client: {result}")
             disconnected.add(connection)
 
     # Clean up disconnected clients
@@ -297,6 +402,14 @@ async def startup_event():
     asyncio.create_task(continuous_scanner(interval=30))
     logger.info("Application started - background scanner running")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop the scan thread, flush the last scan's writes and close database and HTTP connections"""
+    state.scan_executor.shutdown(wait=False, cancel_futures=True)
+    await close_pihole_session()
+    await wait_for_persist()
+    close_db()
+
 @app.get("/")
 async def root():
     return {
@@ -308,21 +421,22 @@ async def root():
 @app.get("/api/devices")
 async def get_devices():
     """Get current device list (REST endpoint for compatibility)"""
-    with state.lock:
-        return {
-            "success": True,
-            "devices": state.devices,
-            "count": len(state.devices),
-            "last_scan": state.last_scan.isoformat() if state.last_scan else None,
-            "scanning": state.scanning
-        }
+    return {
+        "success": True,
+        "devices": state.devices,
+        "count": len(state.devices),
+        "last_scan": state.last_scan,
+        "scanning": state.scanning
+    }
 
 @app.get("/api/database/stats")
 async def get_db_stats():
     """Get database statistics"""
-    stats = get_database_stats()
-    total_scans = get_total_scans()
-    known_devices = get_all_known_devices()
+    # Database calls run in worker threads so they never block the event loop
+    stats = await asyncio.to_thread(get_database_stats)
+    total_scans = await asyncio.to_thread(get_total_scans)
+    known_devices = await asyncio.to_thread(get_all_known_devices_cached)
+    categories = batch_categorize(known_devices)
 
     return {
         "success": True,
@@ -336,7 +450,7 @@ async def get_db_stats():
                 "total_scans": d['total_scans'],
                 "scans_seen_online": d['scans_seen_online'],
                 "appearance_rate": round(d['scans_seen_online'] / d['total_scans'] * 100, 1) if d['total_scans'] > 0 else 0,
-                "category": calculate_device_category(d)[0],  # Get category from tuple
+                "category": categories[d['ip']],
                 "notes": d.get('notes', '')
             }
             for d in known_devices
@@ -347,7 +461,7 @@ async def get_db_stats():
 async def get_cat_log(limit: int = 100):
     """Get categorization log for debugging"""
     try:
-        log_entries = get_categorization_log(limit=limit)
+        log_entries = await asyncio.to_thread(get_categorization_log, limit=limit)
         return {
             "success": True,
             "log": log_entries,
@@ -361,42 +475,39 @@ async def get_cat_log(limit: int = 100):
 async def update_notes(ip: str, notes: dict):
     """Update notes for a device"""
     try:
-        update_device_notes(ip, notes.get('notes', ''))
+        await asyncio.to_thread(update_device_notes, ip, notes.get('notes', ''))
         return {"success": True, "message": "Notes updated"}
     except Exception as e:
         logger.error(f"Error updating notes: {e}")
         return {"success": False, "message": str(e)}
 
 @app.post("/api/devices/{ip}/scan-ports")
-async def scan_device_ports(ip: str, timeout: float = 2.0, max_workers: int = 20):
-    """Scan ports on a specific device"""
+async def scan_device_ports(ip: str, timeout: float = 2.0, max_workers: Optional[int] = None, scan_method: str = "connect"):
+    """
+    Scan ports on a specific device; scan_method="syn" uses a SYN scan when running with sudo.
+    Without max_workers the concurrency is sized to the scan by port_scanner.
+    """
     try:
-        logger.info(f"Starting port scan for {ip} (timeout={timeout}s, workers={max_workers})")
+        logger.info(f"Starting port scan for {ip} (timeout={timeout}s, workers={max_workers or 'auto'})")
 
-        # Run port scan in thread pool to not block event loop
-        loop = asyncio.get_event_loop()
-        results = await loop.run_in_executor(
-            None,
-            lambda: scan_ports(ip, timeout=timeout, max_workers=max_workers)
-        )
+        # Connects are non-blocking, so the scan runs right on the event loop
+        results = await scan_ports_async(ip, timeout=timeout, max_workers=max_workers, scan_method=scan_method)
 
         logger.info(f"Port scan complete for {ip}: {len(results)} open ports")
 
         # Check if this device is running Pi-hole
         pihole_info = None
         if results:
-            open_port_numbers = [r['port'] for r in results]
-            pihole_info = await loop.run_in_executor(
-                None,
-                lambda: check_if_pihole(ip, open_port_numbers)
-            )
+            open_port_numbers = {r['port'] for r in results}
+            pihole = await check_if_pihole(ip, open_port_numbers)
 
-            if pihole_info:
-                logger.info(f"✓ Pi-hole detected on {ip}: {pihole_info['admin_url']}")
+            if pihole:
+                logger.info(f"✓ Pi-hole detected on {ip}: {pihole.admin_url}")
+                pihole_info = asdict(pihole)
 
         # Save results to database (including Pi-hole info)
         if results:
-            save_port_scan_results(ip, results, pihole_info)
+            await asyncio.to_thread(save_port_scan_results, ip, results, pihole_info)
 
         return {
             "success": True,
@@ -406,7 +517,8 @@ async def scan_device_ports(ip: str, timeout: float = 2.0, max_workers: int = 20
             "pihole": pihole_info,
             "config": {
                 "timeout": timeout,
-                "max_workers": max_workers
+                "max_workers": max_workers,
+                "scan_method": scan_method
             }
         }
     except Exception as e:
@@ -417,7 +529,7 @@ async def scan_device_ports(ip: str, timeout: float = 2.0, max_workers: int = 20
 async def get_device_ports(ip: str):
     """Get latest port scan results for a device"""
     try:
-        scan_data = get_latest_port_scan(ip)
+        scan_data = await asyncio.to_thread(get_latest_port_scan, ip)
 
         if scan_data:
             return {
@@ -441,73 +553,32 @@ async def get_device_ports(ip: str):
 async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for real-time device updates"""
     await websocket.accept()
+    if len(state.active_connections) >= MAX_CONNECTIONS:
+        logger.warning(f"Rejecting WebSocket client: {MAX_CONNECTIONS} already connected")
+        await websocket.close(code=1013)
+        return
+
     state.active_connections.add(websocket)
     logger.info(f"WebSocket client connected (total: {len(state.active_connections)})")
 
     try:
         # Send initial state
-        with state.lock:
-            await websocket.send_json({
-                "type": "initial_state",
-                "devices": state.devices,
-                "count": len(state.devices),
-                "timestamp": state.last_scan.isoformat() if state.last_scan else None,
-                "next_scan": state.next_scan.isoformat() if state.next_scan else None,
-                "scan_interval": state.scan_interval,
-                "scanning": state.scanning
-            })
+        await websocket.send_text(orjson.dumps(state.message(
+            "initial_state",
+            devices=state.devices,
+            count=len(state.devices)
+        )).decode())
 
         # Keep connection alive and handle incoming messages
         while True:
             data = await websocket.receive_text()
-            message = json.loads(data)
+            message = orjson.loads(data)
 
             # Handle client requests
             if message.get("type") == "scan_now":
                 logger.info("Client requested immediate scan")
 
-                # Notify scan starting
-                await broadcast({
-                    "type": "scan_start",
-                    "message": "Manual scan requested..."
-                })
-
-                # Trigger immediate scan
-                loop = asyncio.get_event_loop()
-                devices = await loop.run_in_executor(None, scan_network)
-
-                # Record scan in database and get scan_id
-                scan_id = record_scan(len(devices), scan_method="scapy")
-
-                # Compare with previous scan
-                devices_with_status = compare_devices(devices, state.previous_devices, scan_id=scan_id)
-                new_count = sum(1 for d in devices_with_status if d.get('device_status') == 'new')
-                offline_count = sum(1 for d in devices_with_status if d.get('device_status') == 'offline')
-
-                with state.lock:
-                    state.previous_devices = devices.copy()
-                    state.devices = devices_with_status
-                    state.last_scan = datetime.now()
-                    # Note: Don't update next_scan here - background scanner controls schedule
-
-                # Send progress message
-                await broadcast({
-                    "type": "scan_progress",
-                    "message": f"Manual scan complete: {len(devices)} online, {new_count} new, {offline_count} offline"
-                })
-
-                # Broadcast update
-                await broadcast({
-                    "type": "scan_update",
-                    "devices": devices_with_status,
-                    "count": len(devices),
-                    "new_count": new_count,
-                    "offline_count": offline_count,
-                    "timestamp": state.last_scan.isoformat(),
-                    "next_scan": state.next_scan.isoformat() if state.next_scan else None,
-                    "scan_interval": state.scan_interval,
-                    "scanning": False
-                })
+                await perform_scan(manual=True)
 
     except WebSocketDisconnect:
         logger.info("WebSocket client disconnected")
@@ -518,4 +589,28 @@ async def websocket_endpoint(websocket: WebSocket):
         logger.info(f"WebSocket client removed (remaining: {len(state.active_connections)})")
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # permessage-deflate compresses each broadcast frame once on the way
+    # out; the device list JSON compresses very well. Frames stay text
+    # frames since the frontend JSON.parses them. The websockets backend
+    # from requirements.txt is selected explicitly so this doesn't depend
+    # on which WebSocket library uvicorn happens to auto-detect.
+    #
+    # Dead clients (e.g. a laptop put to sleep) are found by uvicorn's
+    # protocol-level pings: a peer that doesn't answer within
+    # ws_ping_timeout is closed, and the endpoint's finally drops it from
+    # active_connections.
+    #
+    # uvloop and httptools cut the per-call overhead of the socket and
+    # executor round-trips every broadcast and scan makes; uvloop doesn't
+    # support Windows, where the stock asyncio loop is used instead.
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        ws="websockets",
+        ws_per_message_deflate=True,
+        ws_ping_interval=20,
+        ws_ping_timeout=20
+    )
@@ -1,44 +1,130 @@
+import ipaddress
 import platform
+import re
 import socket
 import os
-from typing import List, Dict
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+from functools import lru_cache
+from typing import Collection, List, Dict, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Reverse DNS lookups block inside the C resolver and ignore socket
+# timeouts, so they run on a shared pool and are waited on with a deadline
+_dns_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="dns")
+
+# Hostnames rarely change, so lookups are cached across scans: for an hour
+# when they resolve, for five minutes when they don't so a transient
+# failure isn't remembered for long
+DNS_CACHE_TTL = 3600
+DNS_NEGATIVE_CACHE_TTL = 300
+
+_dns_lock = threading.Lock()
+_dns_cache: Dict[str, Tuple[float, str]] = {}  # ip -> (expires_at, hostname)
+_dns_pending: Dict[str, Future] = {}  # Lookups still running, possibly from an earlier scan
+
+# One /proc/net/arp row: IP, HW type, flags, then the MAC. The header row
+# never matches, so it needs no special handling
+ARP_ENTRY_PATTERN = re.compile(rb'^(\d+\.\d+\.\d+\.\d+)\s+\S+\s+\S+\s+([0-9a-fA-F:]{17})', re.M)
+
+# The local IP is looked up with a UDP socket, which is wasted work on
+# every scan; it's reused for ten minutes so a DHCP renewal is still
+# picked up. Failures aren't cached, so a lost connection is retried
+LOCAL_IP_TTL = 600
+
+_local_ip_cache: Tuple[float, str] = (0.0, "")  # (expires_at, ip)
+
+# A MAC answering for more IPs than this isn't one machine with an alias
+# but something answering ARP on behalf of others (a MAC-NAT Wi-Fi
+# extender, proxy ARP), so its IPs are kept as separate devices
+MAX_IPS_PER_MAC = 2
+
 def get_local_ip():
     """Get the local IP address"""
+    global _local_ip_cache
+
+    expires_at, local_ip = _local_ip_cache
+    if time.monotonic() < expires_at:
+        return local_ip
+
     try:
         s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         s.connect(("8.8.8.8", 80))
         local_ip = s.getsockname()[0]
         s.close()
+        _local_ip_cache = (time.monotonic() + LOCAL_IP_TTL, local_ip)
         return local_ip
     except:
         return "127.0.0.1"
 
+@lru_cache(maxsize=16)
 def get_network_prefix(ip):
     """Get network prefix from IP (e.g., 192.168.1.0/24)"""
     parts = ip.split('.')
     return f"{parts[0]}.{parts[1]}.{parts[2]}.0/24"
 
-def resolve_hostname(ip: str, timeout: float = 0.5) -> str:
+def _lookup_hostname(ip: str) -> str:
     """
-    Resolve hostname from IP address using reverse DNS lookup.
-    Returns 'Unknown' if hostname cannot be resolved.
+    Reverse DNS lookup for one IP; blocks for as long as the resolver takes.
+    The result is cached even if the caller gave up waiting for it.
     """
     try:
-        # Set a timeout for the DNS lookup
-        socket.setdefaulttimeout(timeout)
         hostname = socket.gethostbyaddr(ip)[0]
-        return hostname
+        ttl = DNS_CACHE_TTL
     except (socket.herror, socket.gaierror, socket.timeout):
-        return "Unknown"
+        hostname, ttl = "Unknown", DNS_NEGATIVE_CACHE_TTL
     except Exception as e:
         logger.debug(f"Error resolving hostname for {ip}: {e}")
-        return "Unknown"
-    finally:
-        socket.setdefaulttimeout(None)
+        hostname, ttl = "Unknown", DNS_NEGATIVE_CACHE_TTL
+
+    with _dns_lock:
+        _dns_cache[ip] = (time.monotonic() + ttl, hostname)
+        _dns_pending.pop(ip, None)
+    return hostname
+
+def resolve_hostnames(ips: List[str], timeout: float = 0.5) -> List[str]:
+    """
+    Resolve hostnames for many IP addresses concurrently using reverse DNS.
+    Returns them in the same order as ips; any lookup that fails or hasn't
+    finished within timeout seconds comes back as 'Unknown'.
+    """
+    now = time.monotonic()
+    hostnames = {}
+    futures = {}
+
+    with _dns_lock:
+        # Drop expired entries so the cache only holds devices seen recently
+        for ip in [ip for ip, (expires_at, _) in _dns_cache.items() if expires_at <= now]:
+            del _dns_cache[ip]
+
+        for ip in ips:
+            if ip in _dns_cache:
+                hostnames[ip] = _dns_cache[ip][1]
+            elif ip not in futures:
+                # Join a lookup that's still running rather than start another
+                if ip not in _dns_pending:
+                    _dns_pending[ip] = _dns_executor.submit(_lookup_hostname, ip)
+                futures[ip] = _dns_pending[ip]
+
+    if futures:
+        wait(futures.values(), timeout=timeout)
+
+    return [
+        hostnames[ip] if ip in hostnames
+        else futures[ip].result() if futures[ip].done()
+        else "Unknown"
+        for ip in ips
+    ]
+
+def resolve_hostname(ip: str, timeout: float = 0.5) -> str:
+    """
+    Resolve hostname from IP address using reverse DNS lookup.
+    Returns 'Unknown' if hostname cannot be resolved.
+    """
+    return resolve_hostnames([ip], timeout=timeout)[0]
 
 def read_arp_cache_file() -> List[Dict]:
     """
@@ -51,21 +137,27 @@ def read_arp_cache_file() -> List[Dict]:
         if platform.system() == "Linux":
             # Read /proc/net/arp directly
             if os.path.exists('/proc/net/arp'):
-                with open('/proc/net/arp', 'r') as f:
-                    lines = f.readlines()[1:]  # Skip header
-                    for line in lines:
-                        parts = line.split()
-                        if len(parts) >= 4:
-                            ip = parts[0]
-                            mac = parts[3]
-                            if mac != "00:00:00:00:00:00" and not ip.startswith("169.254"):
-                                hostname = resolve_hostname(ip)
-                                devices.append({
-                                    "ip": ip,
-                                    "mac": mac,
-                                    "hostname": hostname,
-                                    "status": "online"
-                                })
+                # procfs files report a size of 0 so they can't be mmap'd;
+                # a single binary read gets the whole table instead
+                with open('/proc/net/arp', 'rb') as f:
+                    data = f.read()
+
+                # Filter on the raw bytes and only decode the entries we keep
+                entries = [
+                    (ip.decode(), mac.decode())
+                    for ip, mac in ARP_ENTRY_PATTERN.findall(data)
+                    if mac != b"00:00:00:00:00:00" and not ip.startswith(b"169.254")
+                ]
+
+                # Resolve all hostnames at once rather than one by one
+                hostnames = resolve_hostnames([ip for ip, _ in entries])
+                for (ip, mac), hostname in zip(entries, hostnames):
+                    devices.append({
+                        "ip": ip,
+                        "mac": mac,
+                        "hostname": hostname,
+                        "status": "online"
+                    })
         else:
             logger.debug("ARP cache file reading not supported on this platform")
 
@@ -74,7 +166,7 @@ def read_arp_cache_file() -> List[Dict]:
 
     return devices
 
-def scan_with_scapy(timeout: int = 5, retry: int = 3) -> List[Dict]:
+def scan_with_scapy(timeout: int = 5, retry: int = 2) -> List[Dict]:
     """
     Active ARP scanning using Scapy (pure Python, no subprocess).
 
@@ -87,7 +179,8 @@ def scan_with_scapy(timeout: int = 5, retry: int = 3) -> List[Dict]:
 
     Args:
         timeout: Seconds to wait for responses (increased from 3 to 5 for sleeping devices)
-        retry: Number of times to retry unanswered requests (increased from 2 to 3)
+        retry: Number of retry rounds in a row that may come back empty before
+            giving up; any round that gets a new answer resets the count
     """
     devices = []
 
@@ -107,12 +200,17 @@ def scan_with_scapy(timeout: int = 5, retry: int = 3) -> List[Dict]:
         ether = Ether(dst="ff:ff:ff:ff:ff:ff")
         packet = ether / arp
 
-        # Send packet and receive responses
-        # Increased timeout and retries to catch devices in power-saving mode
-        answered, unanswered = srp(packet, timeout=timeout, verbose=0, retry=retry)
+        # Send packet and receive responses. Most of a /24 never answers, so
+        # a fixed retry count always ran every round to the full timeout; a
+        # negative retry makes scapy stop once rounds stop turning up new
+        # devices, while still giving ones in power-saving mode a few tries.
+        # threaded=True sends from a separate thread so replies are read
+        # while the broadcast is still going out
+        answered, unanswered = srp(packet, timeout=timeout, verbose=0, retry=-retry, threaded=True)
 
         logger.info(f"Scapy scan complete: {len(answered)} devices responded")
 
+        entries = []
         for sent, received in answered:
             ip = received.psrc
             mac = received.hwsrc
@@ -122,16 +220,17 @@ def scan_with_scapy(timeout: int = 5, retry: int = 3) -> List[Dict]:
                 not ip.startswith("224.") and          # Skip multicast
                 mac != "ff:ff:ff:ff:ff:ff" and        # Skip broadcast
                 not mac.startswith("01:00:5e")):      # Skip multicast MAC
-
-                # Resolve hostname via reverse DNS
-                hostname = resolve_hostname(ip)
-
-                devices.append({
-                    "ip": ip,
-                    "mac": mac,
-                    "hostname": hostname,
-                    "status": "online"
-                })
+                entries.append((ip, mac))
+
+        # Resolve hostnames via reverse DNS, all in parallel
+        hostnames = resolve_hostnames([ip for ip, _ in entries])
+        for (ip, mac), hostname in zip(entries, hostnames):
+            devices.append({
+                "ip": ip,
+                "mac": mac,
+                "hostname": hostname,
+                "status": "online"
+            })
 
     except ImportError:
         logger.error("Scapy is not installed")
@@ -150,10 +249,48 @@ def scan_with_scapy(timeout: int = 5, retry: int = 3) -> List[Dict]:
 
     return devices
 
-def scan_network() -> List[Dict]:
+def dedupe_by_mac(devices: List[Dict], known_ips: Collection[str] = ()) -> List[Dict]:
+    """
+    Collapse entries that share a MAC address into one device.
+
+    A single machine can answer for several IPs (e.g. a router with a VPN
+    alias). One IP is kept and the others are listed under "aliases"; the
+    kept one is an IP in known_ips if there is one, otherwise the lowest,
+    so it doesn't change with reply order from scan to scan. Placeholder
+    MACs like "local" and "unknown" are never merged.
+
+    Wi-Fi range extenders that do MAC NAT answer ARP for every client behind
+    them with their own MAC. A MAC seen on more than MAX_IPS_PER_MAC IPs is
+    therefore not collapsed: each IP stays a device of its own, tagged with
+    "shared_mac".
+    """
+    by_mac: Dict[str, List[Dict]] = {}
+    for device in devices:
+        mac = device['mac'].lower()
+        if mac not in ("local", "unknown"):
+            by_mac.setdefault(mac, []).append(device)
+
+    unique = []
+    for device in devices:
+        group = by_mac.get(device['mac'].lower())
+        if group is None or len(group) == 1:
+            unique.append(device)
+        elif len(group) > MAX_IPS_PER_MAC:
+            unique.append(dict(device, shared_mac=True))
+        elif device is group[0]:
+            # Emitted once per MAC, where the MAC first appeared
+            kept = min(group, key=lambda d: (d['ip'] not in known_ips, ipaddress.ip_address(d['ip'])))
+            aliases = sorted((d['ip'] for d in group if d is not kept), key=ipaddress.ip_address)
+            unique.append(dict(kept, aliases=aliases))
+
+    return unique
+
+def scan_network(known_ips: Collection[str] = ()) -> List[Dict]:
     """
     Scan the local network and return list of devices.
 
+    known_ips are the IPs already in the device database; see dedupe_by_mac().
+
     Strategy:
     1. Try Scapy active scanning (best, but needs sudo)
     2. Fallback to reading ARP cache file on Linux
@@ -189,12 +326,15 @@ def scan_network() -> List[Dict]:
         devices = read_arp_cache_file()
         scan_method = "arp_cache_file" if devices else "none"
 
+    # One entry per physical device, so it's only categorized and stored once
+    devices = dedupe_by_mac(devices, known_ips)
+
     # Always add local machine info
     local_ip = get_local_ip()
     local_hostname = socket.gethostname()
 
     # Check if local machine is already in the list
-    local_exists = any(d['ip'] == local_ip for d in devices)
+    local_exists = any(d['ip'] == local_ip or local_ip in d.get('aliases', ()) for d in devices)
 
     if not local_exists:
         devices.insert(0, {
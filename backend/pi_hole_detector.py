@@ -1,11 +1,274 @@
-import requests
+import asyncio
+import aiohttp
 import logging
-from typing import Optional, Dict
+import orjson
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Dict, Iterable, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Pi-hole admin page; every version serves it, so a 404 here means no Pi-hole
+ADMIN_ENDPOINT = "/admin/"
+
+# Common Pi-hole API endpoints (old and new formats). The ?summary and
+# ?status variants of api.php return the same fields as the plain call,
+# so only one of each API is probed
+PIHOLE_ENDPOINTS = (
+    "/admin/api.php",
+    "/api/stats",  # New Pi-hole v6+
+    ADMIN_ENDPOINT,  # Fallback: check if admin page exists
+)
+
+# Fields only the Pi-hole API returns
+PIHOLE_INDICATORS = frozenset({
+    'gravity_last_updated',  # Pi-hole specific (old API)
+    'domains_being_blocked', # Pi-hole specific (old API)
+    'dns_queries_today',     # Pi-hole specific (old API)
+    'ads_blocked_today',     # Pi-hole specific (old API)
+    'status',                # Common
+})
+
+# "pi-hole", "pihole" or "pi.hole" in an HTML page. The name shows up in
+# the <head>, so only the start of the page is read and searched
+PIHOLE_HTML_PATTERN = re.compile(rb'pi[-.]?hole', re.IGNORECASE)
+HTML_SCAN_BYTES = 8192
+
+# Pi-hole's API summaries are a few KB; a JSON body larger than this is
+# some other service and isn't downloaded
+MAX_JSON_BYTES = 256 * 1024
+
+# Timeouts sized for a LAN, where a Pi-hole answers in well under 50ms:
+# half a second to connect and a second between reads for each probe, and
+# PROBE_DEADLINE seconds for all of a host's probes together
+PROBE_TIMEOUT = aiohttp.ClientTimeout(total=None, sock_connect=0.5, sock_read=1.0)
+PROBE_DEADLINE = 3.0
+PROBE_HEADERS = {'User-Agent': 'LocalNetworkScanner/1.0'}
+
+# Shared by every probe so repeat checks of a host reuse its keep-alive
+# connection instead of a new TCP (and TLS) handshake each time. Created on
+# first use, since it has to be made inside the running event loop
+_session: Optional[aiohttp.ClientSession] = None
+
+
+def _new_session() -> aiohttp.ClientSession:
+    """Session with the pooling, timeout and headers every probe uses"""
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            limit=128,
+            limit_per_host=64,
+            ssl=False  # Don't verify SSL for local devices
+        ),
+        timeout=PROBE_TIMEOUT,
+        headers=PROBE_HEADERS
+    )
+
+
+def get_session() -> aiohttp.ClientSession:
+    """Return the shared probe session, creating it if needed"""
+    global _session
+    if _session is None or _session.closed:
+        _session = _new_session()
+    return _session
+
+
+async def close_session():
+    """Close the shared probe session; called on app shutdown"""
+    global _session
+    if _session is not None:
+        await _session.close()
+        _session = None
+
+
+@dataclass(slots=True)
+class PiholeResult:
+    """A detected Pi-hole. The stats fields stay at their defaults unless detection came from the API"""
+    ip: str
+    protocol: str
+    admin_url: str
+    api_url: str
+    detected: bool = True
+    version: str = 'unknown'
+    status: str = 'unknown'
+    domains_blocked: int = 0
+    queries_today: int = 0
+    ads_blocked_today: int = 0
+
+
+def _build_result(ip: str, protocol: str, api_url: str, data: Optional[Dict] = None) -> PiholeResult:
+    """PiholeResult for a detected host, filled in from the API's JSON response if there was one"""
+    result = PiholeResult(ip=ip, protocol=protocol, admin_url=f"{protocol}://{ip}/admin", api_url=api_url)
+    if data:
+        result.version = data.get('version', 'unknown')
+        result.status = data.get('status', 'unknown')
+        result.domains_blocked = data.get('domains_being_blocked', 0)
+        result.queries_today = data.get('dns_queries_today', 0)
+        result.ads_blocked_today = data.get('ads_blocked_today', 0)
+    return result
+
+
+# Probe outcomes by (ip, protocol), so rescanning a host doesn't probe it
+# again. Hosts that aren't Pi-hole rarely become one, so misses are kept
+# for an hour; hits only for five minutes since DHCP can hand the IP to
+# another device. Only misses where every endpoint answered are cached;
+# probes that time out or fail to connect are retried on the next scan
+PIHOLE_CACHE_TTL = 300
+PIHOLE_NEGATIVE_CACHE_TTL = 3600
+PIHOLE_CACHE_SIZE = 1024
+
+_MISSING = object()
+_pihole_cache: Dict[Tuple[str, str], Tuple[float, Optional[PiholeResult]]] = OrderedDict()  # (ip, protocol) -> (expires_at, result)
+
+
+def _cache_get(ip: str, protocol: str):
+    """Cached probe result for ip/protocol, or _MISSING if absent or expired"""
+    key = (ip, protocol)
+    entry = _pihole_cache.get(key)
+    if entry is None:
+        return _MISSING
+
+    expires_at, result = entry
+    if time.monotonic() >= expires_at:
+        del _pihole_cache[key]
+        return _MISSING
+
+    _pihole_cache.move_to_end(key)
+    return result
+
+
+def _cache_put(ip: str, protocol: str, result: Optional[PiholeResult]):
+    """Remember a probe result, evicting the least recently used entry when full"""
+    ttl = PIHOLE_CACHE_TTL if result else PIHOLE_NEGATIVE_CACHE_TTL
+    _pihole_cache[(ip, protocol)] = (time.monotonic() + ttl, result)
+    _pihole_cache.move_to_end((ip, protocol))
+    if len(_pihole_cache) > PIHOLE_CACHE_SIZE:
+        _pihole_cache.popitem(last=False)
+
+
+async def _read_head(response: aiohttp.ClientResponse, limit: int) -> bytes:
+    """Read up to limit bytes from the start of the body, leaving the rest unread"""
+    head = bytearray()
+    while len(head) < limit:
+        chunk = await response.content.read(limit - len(head))
+        if not chunk:
+            break
+        head.extend(chunk)
+    return bytes(head)
+
+
+async def _probe_endpoint(session: aiohttp.ClientSession, ip: str, protocol: str, endpoint: str):
+    """
+    Query one endpoint and return Pi-hole info if the response looks like Pi-hole.
 
-def detect_pihole(ip: str, https: bool = False) -> Optional[Dict]:
+    Returns None when this endpoint alone can't tell, and False when the
+    response rules Pi-hole out for the whole host. Connection errors and
+    timeouts are raised, since they say nothing about the host either way.
+    """
+    base_url = f"{protocol}://{ip}"
+    url = f"{base_url}{endpoint}"
+    logger.info(f"Checking for Pi-hole at {url}")
+
+    try:
+        async with session.get(url) as response:
+            # Pi-hole's web server tags its responses, which settles it
+            # before any of the body is read
+            if 'X-Pi-hole' in response.headers or 'pi-hole' in response.headers.get('Server', '').lower():
+                logger.info(f"✓ Pi-hole detected at {ip} (found in response headers)")
+                return _build_result(ip, protocol, url)
+
+            if response.status != 200:
+                # A missing admin page is conclusive; other errors (e.g. a
+                # 401 from the v6 API wanting a login) aren't
+                if response.status == 404 and endpoint == ADMIN_ENDPOINT:
+                    logger.debug(f"No admin page at {url}, not a Pi-hole")
+                    return False
+                return None
+
+            # Only the headers have been read so far; decide from them
+            # whether the body is worth downloading at all
+            content_type = response.headers.get('content-type', '')
+
+            # Try JSON response first (API endpoints)
+            if 'json' in content_type.lower():
+                if response.content_length is not None and response.content_length > MAX_JSON_BYTES:
+                    logger.debug(f"Skipping {url}: {response.content_length} byte JSON body is too large for Pi-hole")
+                    return None
+
+                try:
+                    data = orjson.loads(await response.read())
+                except orjson.JSONDecodeError:
+                    # Not valid JSON
+                    return None
+
+                # Check if response looks like Pi-hole
+                # If we find any Pi-hole-specific fields, it's Pi-hole
+                found_indicators = sorted(data.keys() & PIHOLE_INDICATORS) if isinstance(data, dict) else []
+
+                if found_indicators:
+                    logger.info(f"✓ Pi-hole detected at {ip} (found indicators: {found_indicators})")
+                    return _build_result(ip, protocol, url, data)
+
+            # Fallback: Check HTML content for Pi-hole strings
+            elif 'html' in content_type.lower():
+                head = await _read_head(response, HTML_SCAN_BYTES)
+
+                if PIHOLE_HTML_PATTERN.search(head):
+                    logger.info(f"✓ Pi-hole detected at {ip} (found in HTML)")
+                    return _build_result(ip, protocol, url)
+
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        logger.debug(f"Failed to check {url}: {e}")
+        raise
+
+    return None
+
+
+async def _tcp_open(ip: str, port: int, timeout: float = 0.5) -> bool:
+    """Return True if a TCP connection to ip:port succeeds within timeout"""
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout=timeout)
+    except (OSError, asyncio.TimeoutError):
+        return False
+
+    writer.close()
+    return True
+
+
+async def _probe_endpoints(session: aiohttp.ClientSession, ip: str,
+                           protocol: str) -> Tuple[Optional[PiholeResult], bool]:
+    """
+    Probe every endpoint at once and return the first Pi-hole match.
+
+    Also returns whether the outcome is conclusive: False when there was no
+    match but some endpoint failed to connect or timed out.
+    """
+    tasks = [
+        asyncio.ensure_future(_probe_endpoint(session, ip, protocol, endpoint))
+        for endpoint in PIHOLE_ENDPOINTS
+    ]
+    conclusive = True
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                result = await next_done
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                conclusive = False
+                continue
+            if result:
+                return result, True
+            if result is False:
+                return None, True
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    return None, conclusive
+
+
+async def detect_pihole(ip: str, https: bool = False,
+                        session: Optional[aiohttp.ClientSession] = None) -> Optional[PiholeResult]:
     """
     Detect if a device is running Pi-hole by querying its API.
 
@@ -17,127 +280,79 @@ def detect_pihole(ip: str, https: bool = False) -> Optional[Dict]:
     - /admin/api.php?summary - Summary stats
     - /admin/api.php?status - Status check
 
+    All endpoints are probed at once; the first one that identifies Pi-hole
+    wins and the rest are cancelled. A 404 on the admin page stops the
+    search early too. Conclusive outcomes are cached per IP and protocol,
+    see PIHOLE_CACHE_TTL.
+
     Args:
         ip: IP address to check
-        https: Whether to use HTTPS (default False, will try HTTP first)
+        https: Whether to use HTTPS (default False). Only that protocol is
+            checked; callers wanting both, like check_if_pihole(), call once for each
+        session: Session to send the probes on (defaults to the shared one)
 
     Returns:
-        Dict with Pi-hole info if detected, None otherwise
+        PiholeResult if detected, None otherwise
     """
+    if session is None:
+        session = get_session()
+
     protocol = "https" if https else "http"
-    base_url = f"{protocol}://{ip}"
+    port = 443 if https else 80
 
-    # Try different common Pi-hole API endpoints (old and new formats)
-    endpoints_to_try = [
-        "/admin/api.php",
-        "/admin/api.php?summary",
-        "/admin/api.php?status",
-        "/api/stats",  # New Pi-hole v6+
-        "/api/summary",
-        "/admin/",  # Fallback: check if admin page exists
-    ]
+    cached = _cache_get(ip, protocol)
+    if cached is not _MISSING:
+        logger.debug(f"Using cached Pi-hole check for {protocol}://{ip}")
+        if cached:
+            return cached
 
-    for endpoint in endpoints_to_try:
+    # A quick TCP connect rules out a closed or firewalled web port without
+    # waiting on the HTTP timeout for every endpoint
+    elif await _tcp_open(ip, port):
         try:
-            url = f"{base_url}{endpoint}"
-            logger.info(f"Checking for Pi-hole at {url}")
-
-            response = requests.get(
-                url,
-                timeout=5,
-                verify=False,  # Don't verify SSL for local devices
-                headers={'User-Agent': 'LocalNetworkScanner/1.0'}
-            )
-
-            if response.status_code == 200:
-                content_type = response.headers.get('content-type', '')
-
-                # Try JSON response first (API endpoints)
-                if 'json' in content_type.lower():
-                    try:
-                        data = response.json()
-
-                        # Check if response looks like Pi-hole
-                        # Pi-hole API returns specific fields
-                        pihole_indicators = [
-                            'gravity_last_updated',  # Pi-hole specific (old API)
-                            'domains_being_blocked', # Pi-hole specific (old API)
-                            'dns_queries_today',     # Pi-hole specific (old API)
-                            'ads_blocked_today',     # Pi-hole specific (old API)
-                            'status',                # Common
-                        ]
-
-                        # If we find any Pi-hole-specific fields, it's Pi-hole
-                        found_indicators = [key for key in pihole_indicators if key in data]
-
-                        if found_indicators:
-                            logger.info(f"✓ Pi-hole detected at {ip} (found indicators: {found_indicators})")
-
-                            admin_url = f"{base_url}/admin"
-
-                            return {
-                                'detected': True,
-                                'ip': ip,
-                                'protocol': protocol,
-                                'admin_url': admin_url,
-                                'api_url': url,
-                                'version': data.get('version', 'unknown'),
-                                'status': data.get('status', 'unknown'),
-                                'domains_blocked': data.get('domains_being_blocked', 0),
-                                'queries_today': data.get('dns_queries_today', 0),
-                                'ads_blocked_today': data.get('ads_blocked_today', 0),
-                            }
-
-                    except ValueError:
-                        # Not valid JSON
-                        pass
-
-                # Fallback: Check HTML content for Pi-hole strings
-                elif 'html' in content_type.lower():
-                    text = response.text.lower()
-                    pihole_strings = ['pi-hole', 'pihole', 'pi.hole']
-
-                    if any(s in text for s in pihole_strings):
-                        logger.info(f"✓ Pi-hole detected at {ip} (found in HTML)")
-
-                        admin_url = f"{base_url}/admin"
-
-                        return {
-                            'detected': True,
-                            'ip': ip,
-                            'protocol': protocol,
-                            'admin_url': admin_url,
-                            'api_url': url,
-                            'version': 'unknown',
-                            'status': 'unknown',
-                            'domains_blocked': 0,
-                            'queries_today': 0,
-                            'ads_blocked_today': 0,
-                        }
-
-        except requests.RequestException as e:
-            logger.debug(f"Failed to check {url}: {e}")
-            continue
-
-    # If HTTPS didn't work and we tried HTTPS, try HTTP
-    if https:
-        return detect_pihole(ip, https=False)
-
-    logger.info(f"No Pi-hole detected at {ip}")
+            result, conclusive = await asyncio.wait_for(_probe_endpoints(session, ip, protocol),
+                                                        timeout=PROBE_DEADLINE)
+        except asyncio.TimeoutError:
+            logger.debug(f"Pi-hole probes of {protocol}://{ip} ran past {PROBE_DEADLINE}s, giving up")
+            result, conclusive = None, False
+        if conclusive:
+            _cache_put(ip, protocol, result)
+        if result:
+            return result
+    else:
+        logger.debug(f"{ip}:{port} is not accepting connections, skipping {protocol} probes")
+
+    logger.info(f"No Pi-hole detected at {protocol}://{ip}")
     return None
 
 
-def check_if_pihole(ip: str, open_ports: list) -> Optional[Dict]:
+def detect_pihole_sync(ip: str, https: bool = False) -> Optional[PiholeResult]:
+    """
+    Blocking wrapper around detect_pihole() for code outside the event loop.
+
+    Runs on its own short-lived session, as the shared one belongs to the
+    app's event loop.
+    """
+    async def run():
+        async with _new_session() as session:
+            return await detect_pihole(ip, https, session)
+
+    return asyncio.run(run())
+
+
+async def check_if_pihole(ip: str, open_ports: Iterable[int]) -> Optional[PiholeResult]:
     """
     Check if a device with open ports is running Pi-hole.
 
     Args:
         ip: IP address
-        open_ports: List of open port numbers
+        open_ports: Open port numbers, ideally as a set
 
     Returns:
-        Pi-hole info dict if detected, None otherwise
+        PiholeResult if detected, None otherwise
     """
+    open_ports = frozenset(open_ports)
+
     # Check if it has the right ports for Pi-hole
     has_dns = 53 in open_ports
     has_http = 80 in open_ports
@@ -151,15 +366,20 @@ def check_if_pihole(ip: str, open_ports: list) -> Optional[Dict]:
 
     logger.info(f"Device {ip} has DNS + HTTP/HTTPS, checking for Pi-hole...")
 
-    # Try HTTPS first if available, then HTTP
+    # Try HTTPS and HTTP at the same time; the first to find Pi-hole wins
+    tasks = []
     if has_https:
-        result = detect_pihole(ip, https=True)
-        if result:
-            return result
-
+        tasks.append(asyncio.ensure_future(detect_pihole(ip, https=True)))
     if has_http:
-        result = detect_pihole(ip, https=False)
-        if result:
-            return result
+        tasks.append(asyncio.ensure_future(detect_pihole(ip, https=False)))
+
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            if result:
+                return result
+    finally:
+        for task in tasks:
+            task.cancel()
 
     return None
@@ -1,7 +1,14 @@
-import socket
+import asyncio
+import errno
 import logging
-from typing import List, Dict
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
+from typing import List, Dict, Optional, Sequence
+
+# Unix only; used to keep connects in flight under the open-file limit
+try:
+    import resource
+except ImportError:
+    resource = None
 
 logger = logging.getLogger(__name__)
 
@@ -44,50 +51,78 @@ COMMON_PORTS = {
 }
 
 # Default ports to scan (most common)
-DEFAULT_PORTS = [
+DEFAULT_PORTS = (
     21, 22, 23, 25, 53, 80, 110, 143, 443, 445, 465, 587, 631,
     993, 995, 3306, 3389, 5432, 5900, 8080, 8443
-]
+)
+
+
+# Ports scanned per asyncio.gather() call in scan_ports_async()
+PORT_SCAN_BATCH_SIZE = 4096
 
+# Upper bound on connects in flight for one scan, whatever the caller asks
+# for; past this the file descriptors and the network, not the loop, are
+# the bottleneck. Lowered further on systems with a small open-file limit,
+# see _max_concurrent_connects()
+MAX_CONCURRENT_CONNECTS = 500
 
-def scan_port(ip: str, port: int, timeout: float = 2.0, retries: int = 1) -> Dict:
+
+def _max_concurrent_connects() -> int:
     """
-    Scan a single port on the given IP address.
+    MAX_CONCURRENT_CONNECTS, or half the soft open-file limit if that's lower.
 
-    Args:
-        ip: IP address to scan
-        port: Port number to scan
-        timeout: Socket timeout in seconds
-        retries: Number of retries for failed connections
+    macOS defaults to a soft limit of 256, so 500 sockets at once would run
+    out of descriptors; the other half is left for the database, WebSocket
+    clients and the Pi-hole session.
+    """
+    if resource is None:
+        return MAX_CONCURRENT_CONNECTS
 
-    Returns:
-        Dict with port, status, and service information
+    soft_limit, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft_limit == resource.RLIM_INFINITY:
+        return MAX_CONCURRENT_CONNECTS
+    return max(1, min(MAX_CONCURRENT_CONNECTS, soft_limit // 2))
+
+
+def _concurrency_for(port_count: int, max_workers: Optional[int]) -> int:
     """
-    for attempt in range(retries + 1):
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(timeout)
+    How many connects to run at once for a scan of port_count ports.
 
-        try:
-            result = sock.connect_ex((ip, port))
-            sock.close()
+    Without an explicit max_workers this scales with the scan: 20 for the
+    common ports, about one per 32 ports for large ranges.
+    """
+    if max_workers is None:
+        max_workers = max(20, port_count // 32)
+    return max(1, min(port_count, max_workers, _max_concurrent_connects()))
 
-            if result == 0:
+
+async def _scan_port_async(ip: str, port: int, sem: asyncio.Semaphore, timeout: float = 2.0, retries: int = 1) -> Dict:
+    """
+    Scan a single port with a non-blocking connect, limited by sem.
+
+    The exception type says how the connect went: refused is "closed", a
+    timeout is "filtered" and is retried, as are other socket errors.
+    """
+    async with sem:
+        for attempt in range(retries + 1):
+            try:
+                _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout=timeout)
+                writer.close()
                 status = "open"
                 break
-            else:
+            except ConnectionRefusedError:
                 status = "closed"
                 break
-        except socket.timeout:
-            sock.close()
-            if attempt < retries:
-                continue  # Retry
-            status = "filtered"
-        except socket.error as e:
-            sock.close()
-            logger.debug(f"Error scanning {ip}:{port} - {e}")
-            if attempt < retries:
-                continue  # Retry
-            status = "error"
+            except asyncio.TimeoutError:
+                status = "filtered"
+            except OSError as e:
+                if e.errno == errno.EMFILE:
+                    # Out of file descriptors: the result says nothing about
+                    # the port, and the rest of the scan is likely affected too
+                    logger.warning(f"Ran out of file descriptors scanning {ip}:{port} - {e}")
+                else:
+                    logger.debug(f"Error scanning {ip}:{port} - {e}")
+                status = "error"
 
     service = COMMON_PORTS.get(port, "Unknown Service")
 
@@ -98,15 +133,72 @@ def scan_port(ip: str, port: int, timeout: float = 2.0, retries: int = 1) -> Dic
     }
 
 
-def scan_ports(ip: str, ports: List[int] = None, timeout: float = 2.0, max_workers: int = 20) -> List[Dict]:
+def scan_ports_syn(ip: str, ports: Sequence[int] = None, timeout: float = 2.0) -> List[Dict]:
+    """
+    SYN ("half-open") scan using Scapy: send a SYN to every port at once and
+    treat a SYN-ACK as open. No connection is completed, so no socket state
+    is used on either side; the kernel answers each SYN-ACK with a RST.
+
+    Note: Requires raw socket access (sudo / CAP_NET_RAW).
+
+    Args:
+        ip: IP address to scan
+        ports: List of ports to scan (defaults to common ports)
+        timeout: Seconds to wait for replies after the last SYN is sent
+
+    Returns:
+        List of dicts with port scan results (only open ports)
+
+    Raises:
+        ImportError: if Scapy isn't installed
+        PermissionError: if raw sockets aren't available
+    """
+    from scapy.all import IP, TCP, sr, conf
+
+    # Suppress Scapy warnings
+    conf.verb = 0
+
+    if ports is None:
+        ports = DEFAULT_PORTS
+
+    logger.info(f"Starting SYN scan on {ip} for {len(ports)} ports (timeout={timeout}s)")
+
+    answered, _ = sr(IP(dst=ip) / TCP(dport=list(ports), flags="S"), timeout=timeout, verbose=0)
+
+    open_ports = sorted({
+        received[TCP].sport
+        for _, received in answered
+        if received.haslayer(TCP) and received[TCP].flags & 0x12 == 0x12  # SYN-ACK
+    })
+
+    results = [
+        {"port": port, "status": "open", "service": COMMON_PORTS.get(port, "Unknown Service")}
+        for port in open_ports
+    ]
+    for result in results:
+        logger.info(f"Found open port: {ip}:{result['port']} - {result['service']}")
+
+    logger.info(f"SYN scan complete on {ip}: {len(results)} open ports found")
+
+    return results
+
+
+async def scan_ports_async(ip: str, ports: Sequence[int] = None, timeout: float = 2.0,
+                           max_workers: Optional[int] = None, scan_method: str = "connect") -> List[Dict]:
     """
     Scan multiple ports on a given IP address concurrently.
 
+    All connects run on the event loop; max_workers caps how many are in
+    flight at once, so it can go far higher than a thread pool allows.
+
     Args:
         ip: IP address to scan
         ports: List of ports to scan (defaults to common ports)
         timeout: Socket timeout in seconds (default 2.0 for reliability)
-        max_workers: Maximum number of concurrent threads (default 20 to avoid overwhelming network)
+        max_workers: Maximum number of concurrent connects (default: sized to the scan,
+            see _concurrency_for(); never more than _max_concurrent_connects())
+        scan_method: "connect" for a full TCP connect per port, or "syn" for a
+            Scapy SYN scan (needs sudo; falls back to connect if unavailable)
 
     Returns:
         List of dicts with port scan results (only open ports)
@@ -114,28 +206,37 @@ def scan_ports(ip: str, ports: List[int] = None, timeout: float = 2.0, max_worke
     if ports is None:
         ports = DEFAULT_PORTS
 
+    if scan_method == "syn":
+        try:
+            return await asyncio.to_thread(scan_ports_syn, ip, ports, timeout)
+        except ImportError:
+            logger.warning("Scapy is not installed, falling back to connect scan")
+        except (PermissionError, OSError) as e:
+            logger.warning(f"SYN scan unavailable ({e}), falling back to connect scan")
+
+    max_workers = _concurrency_for(len(ports), max_workers)
+
     logger.info(f"Starting port scan on {ip} for {len(ports)} ports (timeout={timeout}s, workers={max_workers})")
 
+    sem = asyncio.Semaphore(max_workers)
     results = []
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Submit all port scans with retry enabled
-        future_to_port = {
-            executor.submit(scan_port, ip, port, timeout, retries=1): port
-            for port in ports
-        }
+    # Work through the ports a batch at a time, so a full-range scan holds
+    # a few thousand coroutines at once rather than one per port
+    port_iter = iter(ports)
+    while batch := list(islice(port_iter, PORT_SCAN_BATCH_SIZE)):
+        scanned = await asyncio.gather(
+            *(_scan_port_async(ip, port, sem, timeout, retries=1) for port in batch),
+            return_exceptions=True
+        )
 
-        # Collect results as they complete
-        for future in as_completed(future_to_port):
-            try:
-                result = future.result()
-                # Only include open ports in results
-                if result['status'] == 'open':
-                    results.append(result)
-                    logger.info(f"Found open port: {ip}:{result['port']} - {result['service']}")
-            except Exception as e:
-                port = future_to_port[future]
-                logger.error(f"Error scanning port {port}: {e}")
+        for port, result in zip(batch, scanned):
+            if isinstance(result, Exception):
+                logger.error(f"Error scanning port {port}: {result}")
+            # Only include open ports in results
+            elif result['status'] == 'open':
+                results.append(result)
+                logger.info(f"Found open port: {ip}:{result['port']} - {result['service']}")
 
     # Sort by port number
     results.sort(key=lambda x: x['port'])
@@ -145,17 +246,22 @@ def scan_ports(ip: str, ports: List[int] = None, timeout: float = 2.0, max_worke
     return results
 
 
-def scan_all_ports(ip: str, timeout: float = 0.3, max_workers: int = 100) -> List[Dict]:
+def scan_ports(ip: str, ports: Sequence[int] = None, timeout: float = 2.0,
+               max_workers: Optional[int] = None, scan_method: str = "connect") -> List[Dict]:
+    """Blocking wrapper around scan_ports_async() for code outside the event loop"""
+    return asyncio.run(scan_ports_async(ip, ports, timeout, max_workers, scan_method))
+
+
+def scan_all_ports(ip: str, timeout: float = 0.3, max_workers: Optional[int] = None) -> List[Dict]:
     """
     Scan all ports 1-65535 (use with caution - takes time!)
 
     Args:
         ip: IP address to scan
         timeout: Socket timeout in seconds (lower for faster scan)
-        max_workers: Maximum number of concurrent threads
+        max_workers: Maximum number of concurrent connects
 
     Returns:
         List of dicts with port scan results (only open ports)
     """
-    all_ports = list(range(1, 65536))
-    return scan_ports(ip, all_ports, timeout, max_workers)
+    return scan_ports(ip, range(1, 65536), timeout, max_workers)
@@ -21,7 +21,7 @@ function App() {
   const [portScanResults, setPortScanResults] = useState({}) // Map of IP -> port scan results
   const [scanningPorts, setScanningPorts] = useState({}) // Map of IP -> scanning status
   const [portScanTimeout, setPortScanTimeout] = useState(2.0)
-  const [portScanWorkers, setPortScanWorkers] = useState(20)
+  const [portScanWorkers, setPortScanWorkers] = useState('') // Empty = sized to the scan by the backend
   const wsRef = useRef(null)
   const reconnectTimeoutRef = useRef(null)
   const countdownIntervalRef = useRef(null)
@@ -52,8 +52,18 @@ function App() {
           setScanLog(prev => [logEntry, ...prev].slice(0, 10)) // Keep last 10 messages
         }
 
-        if (message.type === 'initial_state' || message.type === 'scan_update') {
-          setDevices(message.devices || [])
+        if (message.type === 'initial_state' || message.type === 'scan_update' || message.type === 'scan_delta') {
+          if (message.type === 'scan_delta') {
+            // Merge the changes into the list we already have
+            const removed = new Set(message.removed || [])
+            const changed = new Map([...(message.added || []), ...(message.updated || [])].map(d => [d.ip, d]))
+            setDevices(prev => [
+              ...prev.filter(d => !removed.has(d.ip) && !changed.has(d.ip)),
+              ...changed.values()
+            ])
+          } else {
+            setDevices(message.devices || [])
+          }
 
           if (message.timestamp) {
             const date = new Date(message.timestamp)
@@ -157,7 +167,8 @@ function App() {
       // Set scanning state
       setScanningPorts(prev => ({ ...prev, [ip]: true }))
 
-      const response = await fetch(`http://localhost:8000/api/devices/${ip}/scan-ports?timeout=${portScanTimeout}&max_workers=${portScanWorkers}`, {
+      const workersParam = portScanWorkers ? `&max_workers=${portScanWorkers}` : ''
+      const response = await fetch(`http://localhost:8000/api/devices/${ip}/scan-ports?timeout=${portScanTimeout}${workersParam}`, {
         method: 'POST'
       })
       const data = await response.json()
@@ -441,8 +452,22 @@ function App() {
                               )}
                               {device.hostname}
                             </td>
-                            <td>{device.ip}</td>
-                            <td>{device.mac}</td>
+                            <td>
+                              {device.ip}
+                              {device.aliases?.length > 0 && (
+                                <div style={{ fontSize: '0.75rem', color: '#666' }} title="Other IPs answering with this MAC address">
+                                  also {device.aliases.join(', ')}
+                                </div>
+                              )}
+                            </td>
+                            <td>
+                              {device.mac}
+                              {device.shared_mac && (
+                                <div style={{ fontSize: '0.75rem', color: '#666' }} title="Other IPs answer with this MAC address too, e.g. behind a Wi-Fi extender">
+                                  shared MAC
+                                </div>
+                              )}
+                            </td>
                             <td>{device.status}</td>
                             <td>
                               {editingNotes === device.ip ? (
@@ -915,8 +940,9 @@ function App() {
                 min="5"
                 max="100"
                 step="5"
+                placeholder="Auto"
                 value={portScanWorkers}
-                onChange={(e) => setPortScanWorkers(parseInt(e.target.value))}
+                onChange={(e) => setPortScanWorkers(e.target.value === '' ? '' : parseInt(e.target.value))}
                 style={{
                   width: '100%',
                   padding: '0.25rem',
@@ -926,7 +952,7 @@ function App() {
                 }}
               />
               <div style={{ fontSize: '0.625rem', color: '#999', marginTop: '0.25rem' }}>
-                Lower = more reliable, slower
+                Lower = more reliable, slower; leave empty to size it to the scan
               </div>
             </div>
           </div>